@@ -1,5 +1,9 @@
+import joblib
 import pandas as pd
 
+from genre_taxonomy import apply_taxonomy
+from preprocessing import Winsorizer
+
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -16,44 +20,9 @@ df_spoti = pd.read_csv("./datasets/spotify_data.csv")
 # GENRE MATCH
 ###########
 
-genre_drop_list = ["songwriter", "romance", "detroit-techno", "chicago-house", "grindcore", "party", "show-tunes", "dubstep", "house", 
-                   "drum-and-bass", "trance","minimal-techno", "sad", "progressive-house", "comedy"]
-
-df_spoti = df_spoti[~df_spoti["genre"].isin(genre_drop_list)]
-
-
-inst_genres = ["acoustic", "ambient", "classical", "electronic", "opera", "piano", 
-               "sleep", "guitar", "new-age"]
-
-df_spoti.loc[df_spoti["genre"].isin(inst_genres), "genre"] = "Instrumental"
-
-###################################
-dance_genres = ["deep-house", "disco", "dub", "edm", "electro", "electronic",
-    "dance", "techno", "dancehall", "garage", "hardstyle", "club", "salsa", "samba"]
-df_spoti.loc[df_spoti["genre"].isin(dance_genres), "genre"] = "Dance"
-###################################
-tra_genres = ["country", "folk", "tango", "flamenco","spanish",
-              "french","german","swedish", "indian", "sertanejo", "ska", "forro"]
-df_spoti.loc[df_spoti["genre"].isin(tra_genres), "genre"] = "Traditional"
-###################################
-rap_genres = ["hip-hop", "breakbeat", "funk" ]
-df_spoti.loc[df_spoti["genre"].isin(rap_genres), "genre"] = "Rap"
-###################################
-rb_genres = ["soul", "trip-hop", "blues", "gospel"]
-df_spoti.loc[df_spoti["genre"].isin(rb_genres), "genre"] = "R&B"
-###################################
-rock_genres = ["alt-rock", "hard-rock","punk-rock", "rock","rock-n-roll",
-    "psych-rock","indie-rock", "punk", "goth", "emo", "industrial"]
-df_spoti.loc[df_spoti["genre"].isin(rock_genres), "genre"] = "Rock"
-###################################
-metal_genres = ["black-metal", "death-metal", "heavy-metal", "metal", "metalcore", "hardcore"]
-df_spoti.loc[df_spoti["genre"].isin(metal_genres), "genre"] = "Metal"
-####################################
-pop_genres = ["pop","pop-film", "power-pop", "indie-pop", "cantopop", "k-pop", "singer-songwriter"]
-df_spoti.loc[df_spoti["genre"].isin(pop_genres), "genre"] = "Pop"
-#####################################
-jazz_genres = ["afrobeat", "chill", "groove",  "jazz"]
-df_spoti.loc[df_spoti["genre"].isin(jazz_genres), "genre"] = "Jazz"
+# Drop list and the nine genre buckets live in genre_taxonomy.json; unmapped genres are reported
+
+df_spoti = apply_taxonomy(df_spoti, "genre", "spotify")
 
 ###########
 # MISSING VALUES & OUTLIERS
@@ -62,38 +31,15 @@ df_spoti.loc[df_spoti["genre"].isin(jazz_genres), "genre"] = "Jazz"
 ## Tempo min 40 // max 250
 df_spoti["tempo"] = df_spoti["tempo"].clip(lower=40, upper=250)
 
-# Function to calculate lower and upper thresholds
-def outlier_thresholds(dataframe, col_name, q1=0.05, q3=0.95):
-    quartile1 = dataframe[col_name].quantile(q1)
-    quartile3 = dataframe[col_name].quantile(q3)
-    interquantile_range = quartile3 - quartile1
-    up_limit = quartile3 + 1.5 * interquantile_range
-    low_limit = quartile1 - 1.5 * interquantile_range
-    return low_limit, up_limit
-
-# Function to check for outliers in a specific column
-def check_outlier(dataframe, col_name):
-    if pd.api.types.is_numeric_dtype(dataframe[col_name]):
-        low_limit, up_limit = outlier_thresholds(dataframe, col_name)
-        return dataframe[(dataframe[col_name] > up_limit) | (dataframe[col_name] < low_limit)][col_name]
-    else:
-        return pd.Series([])
-
-# Function to replace outliers with defined thresholds
-def replace_with_thresholds(dataframe, variable, q1=0.05, q3=0.95):
-    low_limit, up_limit = outlier_thresholds(dataframe, variable, q1, q3)
-    dataframe.loc[(dataframe[variable] < low_limit), variable] = low_limit
-    dataframe.loc[(dataframe[variable] > up_limit), variable] = up_limit
-
-# Selecting all numeric columns
-numeric_vars = df_spoti.select_dtypes(include=["int64", "float64"]).columns.tolist()
-
-# Iterating through each numeric column to check and handle outliers
-for col in numeric_vars:
-    outliers = check_outlier(df_spoti, col)
-    if not outliers.empty:
+# IQR limits (0.05/0.95 quantiles) for all numeric columns at once, saved so new data is capped the same way
+winsorizer = Winsorizer(q1=0.05, q3=0.95).fit(df_spoti)
+
+for col, count in winsorizer.outlier_counts(df_spoti).items():
+    if count:
         print(f"Outliers found in {col}. Handling outliers...")
-        replace_with_thresholds(df_spoti, col)
+
+df_spoti = winsorizer.transform(df_spoti)
+joblib.dump(winsorizer, "./models/spotify_winsorizer.pkl")
 
 print("Outlier handling completed.")
 
@@ -1,6 +1,10 @@
+import joblib
 import pandas as pd
 from sklearn.ensemble import RandomForestRegressor
 
+from genre_taxonomy import apply_taxonomy
+from preprocessing import Winsorizer
+
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -54,32 +58,8 @@ df_survey = df_survey.rename(columns={"Frequency [Classical]": "frequency_instru
                                       "Exploratory": "exploratory", "BPM": "tempo", "Anxiety":"anxiety", "Depression":"depression", "Insomnia":"insomnia"})
 
 ## Rename Variables
-tra_genres = ["Country", "Folk", "Gospel"]
-df_survey.loc[df_survey["fav_genre"].isin(tra_genres), "fav_genre"] = "Traditional"
-#############################################
-jazz_genres = ["Jazz"]
-df_survey.loc[df_survey["fav_genre"].isin(jazz_genres), "fav_genre"] = "Jazz"
-#############################################
-dance_genres = ["EDM", "Latin"]
-df_survey.loc[df_survey["fav_genre"].isin(dance_genres), "fav_genre"] = "Dance"
-#############################################
-rb_genres = ["R&B"]
-df_survey.loc[df_survey["fav_genre"].isin(rb_genres), "fav_genre"] = "R&B"
-#############################################
-rock_genres = ["Rock"]
-df_survey.loc[df_survey["fav_genre"].isin(rock_genres), "fav_genre"] = "Rock"
-#############################################
-metal_genres = ["Metal"]
-df_survey.loc[df_survey["fav_genre"].isin(metal_genres), "fav_genre"] = "Metal"
-#############################################
-pop_genres = ["Pop", "K pop"]
-df_survey.loc[df_survey["fav_genre"].isin(pop_genres), "fav_genre"] = "Pop"
-#############################################
-inst_genres = ["Classical", "Video game music", "Lofi"]
-df_survey.loc[df_survey["fav_genre"].isin(inst_genres), "fav_genre"] = "Instrumental"
-#############################################
-rap_genres = ["Hip hop", "Rap"]
-df_survey.loc[df_survey["fav_genre"].isin(rap_genres), "fav_genre"] = "Rap"
+# fav_genre buckets are shared with the Spotify cleaning through genre_taxonomy.json
+df_survey = apply_taxonomy(df_survey, "fav_genre", "survey")
 
 
 ###########
@@ -146,38 +126,15 @@ df_survey.describe(percentiles=percentiles).T.style.background_gradient(axis=1,
 
 ############################################
 
-# Function to calculate lower and upper thresholds
-def outlier_thresholds(dataframe, col_name, q1=0.1, q3=0.9):
-    quartile1 = dataframe[col_name].quantile(q1)
-    quartile3 = dataframe[col_name].quantile(q3)
-    interquantile_range = quartile3 - quartile1
-    up_limit = quartile3 + 1.5 * interquantile_range
-    low_limit = quartile1 - 1.5 * interquantile_range
-    return low_limit, up_limit
-
-# Function to check for outliers in a specific column
-def check_outlier(dataframe, col_name):
-    if pd.api.types.is_numeric_dtype(dataframe[col_name]):
-        low_limit, up_limit = outlier_thresholds(dataframe, col_name)
-        return dataframe[(dataframe[col_name] > up_limit) | (dataframe[col_name] < low_limit)][col_name]
-    else:
-        return pd.Series([])
-
-# Function to replace outliers with defined thresholds
-def replace_with_thresholds(dataframe, variable, q1=0.1, q3=0.9):
-    low_limit, up_limit = outlier_thresholds(dataframe, variable, q1, q3)
-    dataframe.loc[(dataframe[variable] < low_limit), variable] = low_limit
-    dataframe.loc[(dataframe[variable] > up_limit), variable] = up_limit
-
-# Selecting all numeric columns
-numeric_vars = df_survey.select_dtypes(include=["int64", "float64"]).columns.tolist()
-
-# Iterating through each numeric column to check and handle outliers
-for col in numeric_vars:
-    outliers = check_outlier(df_survey, col)
-    if not outliers.empty:
+# IQR limits (0.1/0.9 quantiles) for all numeric columns at once, saved so new data is capped the same way
+winsorizer = Winsorizer(q1=0.1, q3=0.9).fit(df_survey)
+
+for col, count in winsorizer.outlier_counts(df_survey).items():
+    if count:
         print(f"Outliers found in {col}. Handling outliers...")
-        replace_with_thresholds(df_survey, col)
+
+df_survey = winsorizer.transform(df_survey)
+joblib.dump(winsorizer, "./models/survey_winsorizer.pkl")
 
 print("Outlier handling completed.")
 
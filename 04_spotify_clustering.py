@@ -5,8 +5,10 @@ from sklearn.ensemble import RandomForestClassifier
 
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.decomposition import PCA
-from sklearn.cluster import KMeans
-from yellowbrick.cluster import KElbowVisualizer
+
+from clustering import select_k, elbow_k, final_fit, make_bundle, save_bundle, K_CANDIDATES, SAMPLE_SIZE, PCA_COLUMNS
+from preprocessing import QuantileBinner
+from segment_export import export_segments, SEGMENT_TOP_N, SEGMENTS
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -58,14 +60,15 @@ model_df = df_spoti[num_cols]
 sc = MinMaxScaler((0, 1))
 model_df[num_cols] = sc.fit_transform(model_df[num_cols])
 
-kmeans = KMeans()
-elbow = KElbowVisualizer(kmeans, k=(2, 30))
-
-elbow.fit(model_df)
-elbow.show()
-elbow.elbow_value_ # 5
+# Candidate k values are scored in parallel with MiniBatchKMeans on a genre-stratified
+# subsample (inertia, silhouette, Calinski-Harabasz, timings)
+selection = select_k(model_df, K_CANDIDATES, strata=df_spoti["genre"], sample_size=SAMPLE_SIZE)
+print(selection)
+elbow_k(selection) # 5
 
-kmeans = KMeans(n_clusters=5,n_init=50).fit(model_df)
+# The downstream models predict these 5 clusters; set N_CLUSTERS = None to take the elbow
+N_CLUSTERS = 5
+kmeans = final_fit(model_df, N_CLUSTERS or elbow_k(selection), n_init=50)
 
 clusters_kmeans = kmeans.labels_
 
@@ -105,15 +108,13 @@ print(feature_importances)
 #             "acousticness",
 #             "loudness"]
 
-pca_cols = ["mode",
-            "key",
-            "speechiness",
-            "liveness",
-            "popularity"]
+# mode, key, speechiness, liveness, popularity
+pca_cols = PCA_COLUMNS
 
 pca_df = df_spoti[pca_cols]
 
-pca_df = StandardScaler().fit_transform(pca_df)
+pca_scaler = StandardScaler()
+pca_df = pca_scaler.fit_transform(pca_df)
 
 pca = PCA(n_components=2)
 pca_fit = pca.fit_transform(pca_df)
@@ -122,8 +123,9 @@ np.cumsum(pca.explained_variance_ratio_)
 
 pca_df_ =pd.DataFrame(pca_fit, columns=["pc1", "pc2"])
 
-pca_df_["pc1_score"] = pd.qcut(pca_df_["pc1"], 3, labels=[3, 2, 1])
-pca_df_["pc2_score"] = pd.qcut(pca_df_["pc2"], 3, labels=[3, 2, 1])
+# Terciles, lowest scored 3; the fitted edges go into the clustering bundle
+pc_binner = QuantileBinner(n_bins=3, labels=[3, 2, 1]).fit(pca_df_[["pc1", "pc2"]])
+pca_df_[["pc1_score", "pc2_score"]] = pc_binner.transform(pca_df_[["pc1", "pc2"]]).to_numpy()
 
 pca_df_["pc_segment"] = pca_df_["pc1_score"].astype(str) + pca_df_["pc2_score"].astype(str)
 
@@ -133,6 +135,15 @@ final_df = pd.concat([clustered_spoti_df, pca_df_], axis=1)
 final_df.drop(columns=["pc1", "pc2", "pc1_score", "pc2_score"], inplace=True)
 final_df.head()
 
+###########
+# CLUSTERING BUNDLE EXPORT
+###########
+
+# Fitted scalers, KMeans, PCA and the pc1/pc2 tercile binner: python clustering.py assign <csv>
+# labels new tracks with these instead of re-running this script
+
+save_bundle(make_bundle(num_cols, sc, kmeans, pca_cols, pca_scaler, pca, pc_binner))
+
 ###########
 # FINAL_DF EXPORT
 ###########
@@ -143,38 +154,7 @@ final_df.to_csv("./datasets/spotify_clustered.csv", index=False)
 # SEGMENT EXPORTS
 ###########
 
-df_list_11 = final_df[final_df["pc_segment"] == "11"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_11 = df_list_11[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_11.to_csv("./segment_datasets/segment_11.csv", index=False)
-
-df_list_12 = final_df[final_df["pc_segment"] == "12"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_12 = df_list_12[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_12.to_csv("./segment_datasets/segment_12.csv", index=False)
-
-df_list_13 = final_df[final_df["pc_segment"] == "13"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_13 = df_list_13[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_13.to_csv("./segment_datasets/segment_13.csv", index=False)
-
-df_list_21 = final_df[final_df["pc_segment"] == "21"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_21 = df_list_21[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_21.to_csv("./segment_datasets/segment_21.csv", index=False)
-
-df_list_22 = final_df[final_df["pc_segment"] == "22"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_22 = df_list_22[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_22.to_csv("./segment_datasets/segment_22.csv", index=False)
-
-df_list_23 = final_df[final_df["pc_segment"] == "23"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_23 = df_list_23[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_23.to_csv("./segment_datasets/segment_23.csv", index=False)
-
-df_list_31 = final_df[final_df["pc_segment"] == "31"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_31 = df_list_31[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_31.to_csv("./segment_datasets/segment_31.csv", index=False)
-
-df_list_32 = final_df[final_df["pc_segment"] == "32"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_32 = df_list_32[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_32.to_csv("./segment_datasets/segment_32.csv", index=False)
+# Top SEGMENT_TOP_N tracks by popularity for every pc_segment in the grid;
+# layout="parquet" writes one partitioned segments.parquet instead of the CSVs
 
-df_list_33 = final_df[final_df["pc_segment"] == "33"].sort_values("popularity", ascending=False).iloc[:100]
-df_list_33 = df_list_33[["artist_name", "track_name", "track_id"]].reset_index(drop=True)
-df_list_33.to_csv("./segment_datasets/segment_33.csv", index=False)
\ No newline at end of file
+export_segments(final_df, "./segment_datasets", n=SEGMENT_TOP_N, segments=SEGMENTS, layout="csv")
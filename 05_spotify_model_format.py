@@ -1,5 +1,7 @@
+import joblib
 import pandas as pd
-from sklearn.preprocessing import MinMaxScaler
+
+from spotify_features import spotify_model_features, fit_quintile_binner, EMBEDDING_COLUMNS
 
 import warnings
 warnings.filterwarnings("ignore")
@@ -14,37 +16,20 @@ pd.set_option("display.float_format", lambda x: "%.3f" % x)
 df_spoti = pd.read_csv("./datasets/spotify_clustered.csv")
 
 ###########
-# FEATURE EXTRACTION
+# FEATURE EXTRACTION, ENCODING & SCALING
 ###########
 
-## ANXIETY INDEX
-
-df_spoti["anxiety_index"] = (df_spoti["instrumentalness"] + (1 - (df_spoti["tempo"] / 200)) + df_spoti["valence"]) / 3
-
-
-## DEPRESSION INDEX
-
-df_spoti["depression_index"] = ((1 - df_spoti["valence"]) + (1 - df_spoti["danceability"]) + df_spoti["acousticness"]) / 3
-
-
-## INSOMNIA INDEX
-
-df_spoti["insomnia_index"] = ((1 - (df_spoti["energy"]) + df_spoti["acousticness"] + (1 - (df_spoti["loudness"] + 60) / 60))) / 3
-
-
-###########
-# ENCODING & SCALING
-###########
+# Anxiety, depression and insomnia indices (MinMax-scaled), valence/energy quintiles;
+# shared with the nearest-neighbour recommender through spotify_features
 
-minmax_cols = ["anxiety_index", "depression_index", "insomnia_index"]
-scaler = MinMaxScaler()
-df_spoti[minmax_cols] = scaler.fit_transform(df_spoti[minmax_cols])
+# Quintile edges are saved so single tracks and new batches get the same labels
+quintile_binner = fit_quintile_binner(df_spoti)
+joblib.dump(quintile_binner, "./models/spotify_quintile_binner.pkl")
 
-df_spoti["valence"] = pd.qcut(df_spoti["valence"], q=5, labels=[5, 4, 3, 2, 1]).astype(int)
-df_spoti["energy"] = pd.qcut(df_spoti["energy"], q=5, labels=[5, 4, 3, 2, 1]).astype(int)
+df_spoti = spotify_model_features(df_spoti, quintile_binner)
 
 
-columns_to_keep = ["anxiety_index", "depression_index", "insomnia_index", "tempo", "valence", "energy", "cluster"]
+columns_to_keep = EMBEDDING_COLUMNS + ["cluster"]
 df_spoti_model = df_spoti[columns_to_keep]
 
 
@@ -83,7 +83,7 @@ def artist_radar_plot(df, artist_name):
 def genres_by_years(df):
     df = df[df["year"] <= 2022]
     
-    genre_years = df.groupby(["year", "genre"]).size().reset_index(name="count")
+    genre_years = df.groupby(["year", "genre"], observed=True).size().reset_index(name="count")
 
     fig = px.line(
         genre_years,
@@ -117,7 +117,7 @@ def genres_by_years(df):
 
 
 def genre_popularity(df):
-    genre_popularity = df.groupby("genre")["popularity"].mean().reset_index()
+    genre_popularity = df.groupby("genre", observed=True)["popularity"].mean().reset_index()
 
     y_min = 15
     y_max = 40
@@ -171,7 +171,7 @@ def top_songs(df,n):
 
 
 def tempo_by_genre(df):
-    genre_avg_tempo = df.groupby("genre")["tempo"].mean().reset_index()
+    genre_avg_tempo = df.groupby("genre", observed=True)["tempo"].mean().reset_index()
 
     y_min = 100
     y_max = 130
@@ -198,7 +198,7 @@ def tempo_by_genre(df):
 
 
 def d_stage(df):
-    data = df.groupby(["year", "genre"]).size().reset_index(name="count")
+    data = df.groupby(["year", "genre"], observed=True).size().reset_index(name="count")
     
     feature_data = data.pivot(index="year", columns="genre", values="count")
 
@@ -226,7 +226,7 @@ def d_stage(df):
 
 
 def mental_health_by_music(df):
-    psych_data = df.groupby("fav_genre").agg({
+    psych_data = df.groupby("fav_genre", observed=True).agg({
     "anxiety": "mean",
     "depression": "mean",
     "insomnia": "mean"
@@ -269,7 +269,7 @@ def genre_usage(df):
 
 
 def age_genre_dist(df):
-    age_genre_data = df.groupby(["age", "fav_genre"]).size().reset_index(name="count")
+    age_genre_data = df.groupby(["age", "fav_genre"], observed=True).size().reset_index(name="count")
 
     fig = px.bar(
         age_genre_data,
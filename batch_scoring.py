@@ -0,0 +1,100 @@
+import os
+import time
+import argparse
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from chunked_io import read_chunks, PredictionWriter
+from model_registry import load_model
+from parallel import process_pool_context
+from preprocessing import SURVEY_INPUT_COLUMNS, load_preprocessing, preprocess_survey_df
+
+
+PREDICTION_COLUMNS = ["tempo", "anxiety", "depression", "insomnia"]
+
+
+###########
+# SCORING
+###########
+
+def score_chunk(chunk, id_columns=()):
+    pipeline = load_preprocessing("survey_preprocessing", new_data=chunk)
+
+    X = preprocess_survey_df(chunk[SURVEY_INPUT_COLUMNS].reset_index(drop=True), pipeline)
+
+    predictions = pd.DataFrame({col: chunk[col].to_numpy() for col in id_columns})
+    predictions["tempo"] = load_model("tempo_model").predict(X)
+    predictions["anxiety"] = load_model("anx_model").predict_proba(X)[:, 1]
+    predictions["depression"] = load_model("dep_model").predict_proba(X)[:, 1]
+    predictions["insomnia"] = load_model("ins_model").predict_proba(X)[:, 1]
+
+    return predictions
+
+
+def _warm_worker():
+    # Each worker process holds its own registry; load everything before the first chunk arrives
+    load_preprocessing("survey_preprocessing")
+    for name in ["tempo_model", "anx_model", "dep_model", "ins_model"]:
+        load_model(name)
+
+
+###########
+# BATCH RUN
+###########
+
+def score_file(input_path, output_path, chunk_size=10_000, workers=None, id_columns=()):
+    workers = os.cpu_count() if workers is None else workers
+    columns = list(id_columns) + SURVEY_INPUT_COLUMNS
+
+    writer = PredictionWriter(output_path)
+    stats = {"rows": 0, "chunks": 0}
+    start = time.perf_counter()
+
+    def record(predictions):
+        writer.write(predictions)
+        stats["rows"] += len(predictions)
+        stats["chunks"] += 1
+        elapsed = time.perf_counter() - start
+        print(f"chunk {stats['chunks']}: {stats['rows']} rows, {stats['rows'] / elapsed:,.0f} rows/s")
+
+    try:
+        if workers == 0:
+            _warm_worker()
+            for chunk in read_chunks(input_path, chunk_size, columns):
+                record(score_chunk(chunk, id_columns))
+        else:
+            # Keep a bounded number of chunks in flight so memory does not grow with the input size
+            with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context(),
+                                     initializer=_warm_worker) as executor:
+                pending = deque()
+                for chunk in read_chunks(input_path, chunk_size, columns):
+                    pending.append(executor.submit(score_chunk, chunk, id_columns))
+                    if len(pending) >= workers * 2:
+                        record(pending.popleft().result())
+                while pending:
+                    record(pending.popleft().result())
+    finally:
+        writer.close()
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rows_per_second"] = stats["rows"] / stats["seconds"] if stats["seconds"] else 0.0
+
+    print(f"Scored {stats['rows']} rows in {stats['chunks']} chunks, "
+          f"{stats['seconds']:.2f} s ({stats['rows_per_second']:,.0f} rows/s) with {workers} workers")
+
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Score survey answers with the tempo/anxiety/depression/insomnia models")
+    parser.add_argument("input", help="CSV or Parquet file with the survey answer columns")
+    parser.add_argument("output", help="CSV or Parquet file to write predictions to")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=None, help="process pool size, 0 scores in-process")
+    parser.add_argument("--id-columns", nargs="*", default=[], help="columns copied through to the output")
+    args = parser.parse_args()
+
+    score_file(args.input, args.output, chunk_size=args.chunk_size, workers=args.workers,
+               id_columns=args.id_columns)
@@ -0,0 +1,119 @@
+import sys
+import time
+import argparse
+
+import pandas as pd
+from sklearn.preprocessing import MinMaxScaler
+
+sys.path.insert(0, ".")
+from preprocessing import FeatureEngineer
+
+# Run from the repository root: python benchmarks/feature_engineer_benchmark.py
+
+
+###########
+# ROW-WISE REFERENCE (previous FeatureEngineer.transform)
+###########
+
+def rowwise_transform(X):
+    X_ = X.copy()
+
+    def get_age_group(age):
+        if age >= 77:
+            return 5
+        elif age >= 59:
+            return 4
+        elif age >= 43:
+            return 3
+        elif age >= 27:
+            return 2
+        elif age >= 11:
+            return 1
+        else:
+            return 0
+
+    X_["age_group"] = X_["age"].apply(get_age_group)
+    X_["age_group"] = X_["age_group"].astype(int)
+
+    freq_cols = [col for col in X_.columns if "frequency" in col]
+    ordinal_mapping = {"Never": 0, "Rarely": 1, "Sometimes": 2, "Often": 3}
+    for col in freq_cols:
+        X_[col] = X_[col].map(ordinal_mapping)
+
+    X_["average_frequency"] = X_[freq_cols].mean(axis=1)
+
+    def calculate_genre_diversity(row):
+        non_zero_genres = sum(1 for value in row if value > 0)
+        return non_zero_genres / len(freq_cols)
+    X_["genre_diversity"] = X_[freq_cols].apply(calculate_genre_diversity, axis=1)
+
+    X_["normalized_hours"] = MinMaxScaler(feature_range=(0, 1)).fit_transform(X_[["hours_per_day"]])
+    X_["music_consumption_profile"] = (X_["normalized_hours"] * 0.3 +
+                                       X_["genre_diversity"] * 0.3 +
+                                       X_["average_frequency"] / 3 * 0.4)
+    X_.drop(columns="normalized_hours", inplace=True)
+
+    X_["rock_metal_affinity"] = (X_["frequency_metal"] + X_["frequency_rock"] + 1) / 2
+    X_["mainstream_music_score"] = X_["average_frequency"] * (1 - X_["genre_diversity"])
+
+    return X_.drop(columns="average_frequency")
+
+
+###########
+# BENCHMARK
+###########
+
+def time_it(func, data, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(data)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def check_row_consistency(df_survey, n_rows=50):
+    feature_engineer = FeatureEngineer().fit(df_survey)
+    sample = df_survey.sample(n_rows, random_state=0)
+
+    batched = feature_engineer.transform(sample)
+    single = pd.concat([feature_engineer.transform(sample.iloc[[i]]) for i in range(n_rows)])
+
+    pd.testing.assert_frame_equal(single, batched)
+    print(f"single-row and batched transforms agree on {n_rows} rows")
+
+
+def run(sizes, reference_limit, repeat):
+    df_survey = pd.read_csv("./datasets/mental_final.csv")
+
+    check_row_consistency(df_survey)
+
+    print(f"{'rows':>10} {'vectorized rows/s':>20} {'row-wise rows/s':>18} {'speedup':>9}")
+
+    for n in sizes:
+        data = df_survey.sample(n, replace=True, random_state=42).reset_index(drop=True)
+
+        # Fitted on the batch itself, the learned hours range equals the row-wise per-batch MinMaxScaler
+        feature_engineer = FeatureEngineer().fit(data)
+
+        vec_time, vec_result = time_it(feature_engineer.transform, data, repeat)
+
+        if n <= reference_limit:
+            ref_time, ref_result = time_it(rowwise_transform, data, 1)
+            pd.testing.assert_frame_equal(vec_result, ref_result[vec_result.columns])
+            reference = f"{n / ref_time:>18,.0f} {ref_time / vec_time:>8.1f}x"
+        else:
+            reference = f"{'skipped':>18} {'':>9}"
+
+        print(f"{n:>10,} {n / vec_time:>20,.0f} {reference}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FeatureEngineer.transform throughput")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--reference-limit", type=int, default=100_000,
+                        help="largest size the row-wise reference is timed (and checked) at")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    run(args.sizes, args.reference_limit, args.repeat)
@@ -0,0 +1,80 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, ".")
+from nearest_recommender import NearestTrackIndex
+from spotify_features import EMBEDDING_COLUMNS
+
+# Run from the repository root: python benchmarks/nearest_recommender_benchmark.py
+# Synthetic catalogues in the spotify_model space; pass --catalogue to index real tracks.
+
+
+def synthetic_catalogue(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"track_id": np.arange(n).astype(str),
+                         "instrumentalness": rng.beta(0.5, 2, n),
+                         "tempo": rng.normal(120, 30, n).clip(0, 250),
+                         "valence": rng.random(n),
+                         "danceability": rng.beta(5, 3, n),
+                         "acousticness": rng.beta(0.7, 1.5, n),
+                         "energy": rng.random(n),
+                         "loudness": rng.normal(-9, 5, n).clip(-60, 0)})
+
+
+def random_profiles(n, seed=1):
+    rng = np.random.default_rng(seed)
+    return [dict(zip(EMBEDDING_COLUMNS, [rng.random(), rng.random(), rng.random(),
+                                         rng.normal(120, 30), rng.integers(1, 6), rng.integers(1, 6)]))
+            for _ in range(n)]
+
+
+def exact_distances(index, profile, k):
+    diff = index.vectors - index._scale_query(profile)
+    return np.sort(np.sqrt(np.einsum("ij,ij->i", diff, diff)))[:k]
+
+
+def run(catalogues, k, n_queries):
+    profiles = random_profiles(n_queries)
+
+    print(f"{'tracks':>10} {'method':>8} {'build s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+
+    for name, df_tracks in catalogues:
+        for method in NearestTrackIndex.methods:
+            start = time.perf_counter()
+            index = NearestTrackIndex.from_tracks(df_tracks, method=method)
+            build = time.perf_counter() - start
+
+            # Both methods are exact: distances must match a full sort
+            for profile in profiles[:5]:
+                np.testing.assert_allclose(index.query(profile, k)[1], exact_distances(index, profile, k),
+                                           rtol=1e-4, atol=1e-6)
+
+            latencies = []
+            for profile in profiles:
+                start = time.perf_counter()
+                index.query(profile, k)
+                latencies.append(time.perf_counter() - start)
+
+            p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+            print(f"{name:>10} {method:>8} {build:>9.2f} {p50:>8.3f} {p99:>8.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nearest track recommender latency")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100_000, 1_000_000, 3_000_000])
+    parser.add_argument("--catalogue", default=None, help="CSV with track_id and the audio feature columns")
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.catalogue:
+        df_catalogue = pd.read_csv(args.catalogue)
+        catalogues = [(f"{len(df_catalogue):,}", df_catalogue)]
+    else:
+        catalogues = [(f"{n:,}", synthetic_catalogue(n)) for n in args.sizes]
+
+    run(catalogues, args.k, args.queries)
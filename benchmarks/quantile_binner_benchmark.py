@@ -0,0 +1,59 @@
+import sys
+import time
+import argparse
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, ".")
+from preprocessing import QuantileBinner
+
+# Run from the repository root: python benchmarks/quantile_binner_benchmark.py
+# Exact (qcut) edges against the one-pass reservoir fit, on valence/energy-like columns.
+
+
+def synthetic_columns(n, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"valence": rng.beta(2, 2, n), "energy": rng.beta(3, 1.5, n)})
+
+
+def run(sizes, chunk_size, reservoir_size, n_bins):
+    labels = list(range(n_bins, 0, -1))
+
+    # Bin assignments must not depend on batch size
+    binner = QuantileBinner(n_bins, labels=labels).fit(synthetic_columns(10_000))
+    data = synthetic_columns(1_000, seed=1)
+    single = pd.concat([binner.transform(data.iloc[[i]]) for i in range(len(data))])
+    pd.testing.assert_frame_equal(single, binner.transform(data))
+    print("single-row and batched transforms agree")
+
+    print(f"{'rows':>12} {'exact fit s':>12} {'stream fit s':>13} {'agreement':>10} {'max edge err':>13}")
+
+    for n in sizes:
+        data = synthetic_columns(n)
+
+        start = time.perf_counter()
+        exact = QuantileBinner(n_bins, labels=labels).fit(data)
+        exact_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stream = QuantileBinner(n_bins, labels=labels, reservoir_size=reservoir_size)
+        for chunk_start in range(0, n, chunk_size):
+            stream.partial_fit(data.iloc[chunk_start:chunk_start + chunk_size])
+        stream_time = time.perf_counter() - start
+
+        agreement = (exact.transform(data) == stream.transform(data)).to_numpy().mean()
+        edge_error = max(np.abs(exact.edges_[col] - stream.edges_[col]).max() for col in data.columns)
+
+        print(f"{n:>12,} {exact_time:>12.3f} {stream_time:>13.3f} {agreement:>10.4f} {edge_error:>13.5f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="QuantileBinner exact vs streaming fit")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[100_000, 1_000_000, 10_000_000])
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    parser.add_argument("--reservoir-size", type=int, default=100_000)
+    parser.add_argument("--bins", type=int, default=5)
+    args = parser.parse_args()
+
+    run(args.sizes, args.chunk_size, args.reservoir_size, args.bins)
@@ -0,0 +1,152 @@
+import os
+import sys
+import time
+import json
+import argparse
+import tempfile
+import subprocess
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, ".")
+from sklearn.cluster import KMeans
+from sklearn.decomposition import PCA
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from clustering import CLUSTER_COLUMNS, PCA_COLUMNS
+from spotify_pipeline import SPOTIFY_DTYPES, clean_chunk
+from preprocessing import Winsorizer, QuantileBinner
+
+# Run from the repository root: python benchmarks/spotify_pipeline_benchmark.py
+# Peak memory of spotify_pipeline.py against the in-memory 02 step as the track
+# dump grows, each in its own process (peak RSS from os.wait4). At the smallest
+# size the chunked spotify_final is checked against the in-memory one.
+
+IN_MEMORY_02 = """
+import sys
+import pandas as pd
+from spotify_pipeline import SPOTIFY_DTYPES, clean_chunk
+from preprocessing import Winsorizer
+df = clean_chunk(pd.read_csv(sys.argv[1], usecols=list(SPOTIFY_DTYPES), dtype=SPOTIFY_DTYPES))
+Winsorizer(q1=0.05, q3=0.95).fit_transform(df).to_csv(sys.argv[2], index=False)
+"""
+
+
+def synthetic_dump(n, path, seed=0):
+    # Audio features around a few centres, and correlated mode/key/speechiness/liveness/popularity,
+    # so the clusters and principal components are well defined
+    rng = np.random.default_rng(seed)
+    genres = json.load(open("genre_taxonomy.json"))["spotify"]
+    genres = [genre for bucket in genres["buckets"].values() for genre in bucket] + genres["drop"]
+
+    centre = rng.integers(0, 5, n)
+    offsets = rng.normal(0, 0.08, (n, 6))
+    profile = np.array([[0.2, 0.3, 0.1, 0.8, 0.2, 0.3], [0.7, 0.8, 0.1, 0.1, 0.8, 0.6],
+                        [0.5, 0.5, 0.8, 0.7, 0.4, 0.2], [0.8, 0.9, 0.0, 0.0, 0.9, 0.8],
+                        [0.3, 0.2, 0.5, 0.9, 0.1, 0.1]])[centre] + offsets
+    latent = rng.normal(size=n)
+
+    dataframe = pd.DataFrame({"artist_name": rng.choice(["a", "b", "c"], n),
+                              "track_name": rng.choice(["x", "y", "z"], n),
+                              "track_id": [f"t{i:010d}" for i in range(n)],
+                              "popularity": np.clip(40 + 15 * latent + rng.normal(0, 5, n), 0, 100).astype(np.int64),
+                              "year": rng.integers(2000, 2024, n),
+                              "genre": rng.choice(genres, n),
+                              "danceability": profile[:, 0].clip(0, 1),
+                              "energy": profile[:, 1].clip(0, 1),
+                              "key": np.clip(6 + 3 * latent + rng.normal(0, 1, n), 0, 11).astype(np.int64),
+                              "loudness": -30 + 25 * profile[:, 1] + rng.normal(0, 2, n),
+                              "mode": (latent + rng.normal(0, 0.5, n) > 0).astype(np.int64),
+                              "speechiness": np.abs(0.1 + 0.05 * latent + rng.normal(0, 0.02, n)),
+                              "acousticness": profile[:, 2].clip(0, 1),
+                              "instrumentalness": profile[:, 3].clip(0, 1),
+                              "liveness": np.abs(0.2 - 0.08 * latent + rng.normal(0, 0.03, n)),
+                              "valence": profile[:, 4].clip(0, 1),
+                              "tempo": 70 + 100 * profile[:, 5] + rng.normal(0, 10, n),
+                              "duration_ms": rng.lognormal(12.3, 0.4, n).astype(np.int64),
+                              "time_signature": rng.choice([1, 3, 4, 5], n, p=[.02, .08, .85, .05])})
+    dataframe.loc[rng.choice(n, n // 1000, replace=False), "popularity"] = 100_000
+    dataframe.to_csv(path, index=False)
+
+
+# A forked child starts with its parent's peak RSS, so the measured process is
+# started from a small launcher rather than from this (large) benchmark process
+LAUNCHER = """
+import os, sys, subprocess
+process = subprocess.Popen(sys.argv[1:], stdout=subprocess.DEVNULL)
+_, status, usage = os.wait4(process.pid, 0)
+print(status, usage.ru_maxrss)
+"""
+
+
+def run_process(args):
+    # Wall time and peak RSS (MB) of one child process
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, "-c", LAUNCHER, sys.executable] + args, capture_output=True,
+                            text=True, check=True).stdout
+    status, max_rss = map(int, output.split())
+    if status != 0:
+        raise RuntimeError(f"{' '.join(args)} exited with status {status}")
+    return time.perf_counter() - start, max_rss / 1024
+
+
+def check_final(raw_path, work_dir):
+    # With a reservoir holding every row the quantile caps are exact: same spotify_final as 02
+    final_path = os.path.join(work_dir, "final_check.csv")
+    clustered_path = os.path.join(work_dir, "clustered_check.csv")
+    run_process(["spotify_pipeline.py", "--input", raw_path, "--final", final_path, "--clustered", clustered_path,
+                 "--model", os.path.join(work_dir, "model.csv"), "--segment-dir", os.path.join(work_dir, "segments"),
+                 "--model-dir", os.path.join(work_dir, "models"), "--reservoir-size", "10000000"])
+
+    dataframe = clean_chunk(pd.read_csv(raw_path, usecols=list(SPOTIFY_DTYPES), dtype=SPOTIFY_DTYPES))
+    expected_path = os.path.join(work_dir, "final_expected.csv")
+    Winsorizer(q1=0.05, q3=0.95).fit_transform(dataframe).to_csv(expected_path, index=False)
+    expected = pd.read_csv(expected_path)
+    pd.testing.assert_frame_equal(pd.read_csv(final_path), expected)
+    print("chunked spotify_final matches the in-memory 02 output")
+
+    # 04's full-batch KMeans and PCA terciles against the streamed fits
+    clustered = pd.read_csv(clustered_path)
+    kmeans = KMeans(n_clusters=5, n_init=10, random_state=42).fit(MinMaxScaler().fit_transform(expected[CLUSTER_COLUMNS]))
+    pcs = PCA(n_components=2).fit_transform(StandardScaler().fit_transform(expected[PCA_COLUMNS]))
+    scores = QuantileBinner(n_bins=3, labels=[3, 2, 1]).fit_transform(pd.DataFrame(pcs, columns=["pc1", "pc2"]))
+    pc_segment = scores["pc1"] * 10 + scores["pc2"]
+    print(f"cluster adjusted Rand index vs KMeans: {adjusted_rand_score(kmeans.labels_, clustered['cluster']):.4f}, "
+          f"pc_segment agreement vs PCA: {(pc_segment.to_numpy() == clustered['pc_segment'].to_numpy()).mean():.4f}")
+
+
+def run(sizes, chunk_size):
+    with tempfile.TemporaryDirectory() as work_dir:
+        print(f"{'tracks':>12} {'02 in memory s':>15} {'02 peak MB':>11} {'pipeline s':>11} {'pipeline peak MB':>17}")
+
+        for i, n in enumerate(sizes):
+            raw_path = os.path.join(work_dir, f"spotify_data_{n}.csv")
+            synthetic_dump(n, raw_path)
+
+            if i == 0:
+                check_final(raw_path, work_dir)
+
+            script = os.path.join(work_dir, "in_memory_02.py")
+            with open(script, "w") as f:
+                f.write(f"import sys\nsys.path.insert(0, {os.getcwd()!r})\n" + IN_MEMORY_02)
+            memory_time, memory_peak = run_process([script, raw_path, os.path.join(work_dir, "final_memory.csv")])
+
+            pipeline_time, pipeline_peak = run_process(
+                ["spotify_pipeline.py", "--input", raw_path, "--final", os.path.join(work_dir, "final.csv"),
+                 "--clustered", os.path.join(work_dir, "clustered.csv"), "--model", os.path.join(work_dir, "model.csv"),
+                 "--segment-dir", os.path.join(work_dir, "segments"), "--model-dir", os.path.join(work_dir, "models"),
+                 "--chunk-size", str(chunk_size)])
+
+            print(f"{n:>12,} {memory_time:>15.2f} {memory_peak:>11.0f} {pipeline_time:>11.2f} {pipeline_peak:>17.0f}")
+            os.remove(raw_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked Spotify pipeline: peak memory vs dump size")
+    parser.add_argument("--sizes", type=int, nargs="*", default=[250_000, 500_000, 1_000_000, 2_000_000])
+    parser.add_argument("--chunk-size", type=int, default=100_000)
+    args = parser.parse_args()
+
+    run(args.sizes, args.chunk_size)
@@ -0,0 +1,44 @@
+import sys
+import glob
+import time
+import argparse
+
+sys.path.insert(0, ".")
+from horoscope_webscraping import parsers
+
+# Run from the repository root: python benchmarks/star_ratings_parse_benchmark.py
+# Sample pages mirror the horoscope.com star-ratings layout; save real pages next to them to compare.
+
+
+def run(page_paths, repeat):
+    pages = [open(path, "rb").read() for path in page_paths]
+
+    expected = [parsers["soup"](page) for page in pages]
+
+    print(f"{len(pages)} pages, {sum(map(len, pages)) / len(pages) / 1024:.0f} KB on average")
+    print(f"{'backend':>10} {'ms/page':>10} {'pages/s':>10} {'speedup':>9}")
+
+    baseline = None
+    for name in ["soup", "strainer", "lxml"]:
+        parse = parsers[name]
+
+        results = [parse(page) for page in pages]
+        assert results == expected, f"{name} disagrees with the html.parser result"
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for page in pages:
+                parse(page)
+        per_page = (time.perf_counter() - start) / (repeat * len(pages))
+
+        baseline = baseline or per_page
+        print(f"{name:>10} {per_page * 1000:>10.3f} {1 / per_page:>10,.0f} {baseline / per_page:>8.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Star ratings parsing backends")
+    parser.add_argument("--pages", default="./benchmarks/fixtures/star_ratings/*.html")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    run(sorted(glob.glob(args.pages)), args.repeat)
@@ -0,0 +1,111 @@
+import os
+import sys
+import time
+import argparse
+import warnings
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, ".")
+from preprocessing import Winsorizer
+
+# Run from the repository root: python benchmarks/winsorizer_benchmark.py
+# The per-column check_outlier/replace_with_thresholds loop of 02/03 against
+# Winsorizer, on the full spotify_data.csv when present, else synthetic tracks.
+
+SPOTIFY_PATH = "./datasets/spotify_data.csv"
+
+# The loop's float-into-int .loc assignments warn on every column
+warnings.filterwarnings("ignore", category=FutureWarning)
+
+
+def synthetic_tracks(n, seed=0):
+    rng = np.random.default_rng(seed)
+    dataframe = pd.DataFrame({"popularity": rng.integers(0, 100, n),
+                              "year": rng.integers(2000, 2024, n),
+                              "danceability": rng.beta(2, 2, n),
+                              "energy": rng.beta(3, 1.5, n),
+                              "key": rng.integers(0, 12, n),
+                              "loudness": rng.normal(-9, 5, n),
+                              "speechiness": rng.exponential(0.08, n),
+                              "liveness": rng.exponential(0.2, n),
+                              "valence": rng.beta(2, 2, n),
+                              "tempo": rng.normal(120, 30, n),
+                              "duration_ms": rng.lognormal(12.3, 0.5, n).astype(np.int64),
+                              "time_signature": rng.choice([0, 1, 3, 4, 5], n, p=[.01, .01, .08, .85, .05])})
+    dataframe.loc[rng.choice(n, n // 1000, replace=False), "popularity"] = 100_000
+    return dataframe
+
+
+def outlier_thresholds(dataframe, col_name, q1, q3):
+    quartile1 = dataframe[col_name].quantile(q1)
+    quartile3 = dataframe[col_name].quantile(q3)
+    interquantile_range = quartile3 - quartile1
+    return quartile1 - 1.5 * interquantile_range, quartile3 + 1.5 * interquantile_range
+
+
+def loop_capping(dataframe, q1, q3):
+    # The loop from 02_eda_spotify.py / 03_eda_survey.py
+    dataframe = dataframe.copy()
+    for col in dataframe.select_dtypes(include=["int64", "float64"]).columns:
+        low_limit, up_limit = outlier_thresholds(dataframe, col, q1, q3)
+        outliers = dataframe[(dataframe[col] > up_limit) | (dataframe[col] < low_limit)][col]
+        if not outliers.empty:
+            low_limit, up_limit = outlier_thresholds(dataframe, col, q1, q3)
+            dataframe.loc[(dataframe[col] < low_limit), col] = low_limit
+            dataframe.loc[(dataframe[col] > up_limit), col] = up_limit
+    return dataframe
+
+
+def timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+
+def run(dataframe, q1, q3, repeats):
+    numeric = dataframe.select_dtypes(include=["int64", "float64"]).columns
+    print(f"{len(dataframe):,} rows, {len(numeric)} numeric columns, quantiles {q1}/{q3}")
+
+    loop_result, loop_time = timed(lambda: loop_capping(dataframe, q1, q3), repeats)
+    winsor_result, winsor_time = timed(lambda: Winsorizer(q1=q1, q3=q3).fit(dataframe).transform(dataframe),
+                                       repeats)
+
+    pd.testing.assert_frame_equal(loop_result, winsor_result)
+    print("loop and Winsorizer outputs are identical (values and dtypes)")
+
+    # Fitted limits reused on a single row give the same caps as the full batch
+    winsorizer = Winsorizer(q1=q1, q3=q3).fit(dataframe)
+    row = dataframe.iloc[[int(dataframe["popularity"].to_numpy().argmax())]] if "popularity" in dataframe \
+        else dataframe.iloc[[0]]
+    single = winsorizer.transform(row)
+    np.testing.assert_allclose(single[numeric].to_numpy(dtype=float),
+                               winsor_result.loc[row.index, numeric].to_numpy(dtype=float))
+    print("single-row transform matches the batch")
+
+    print(f"{'method':>12} {'seconds':>10}")
+    print(f"{'loop':>12} {loop_time:>10.3f}")
+    print(f"{'winsorizer':>12} {winsor_time:>10.3f}")
+    print(f"speedup {loop_time / winsor_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-column outlier loop vs Winsorizer")
+    parser.add_argument("--path", default=SPOTIFY_PATH)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic rows when --path is missing")
+    parser.add_argument("--q1", type=float, default=0.05)
+    parser.add_argument("--q3", type=float, default=0.95)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        data = pd.read_csv(args.path)
+    else:
+        print(f"{args.path} not found, using {args.rows:,} synthetic tracks")
+        data = synthetic_tracks(args.rows)
+
+    run(data, args.q1, args.q3, args.repeats)
@@ -0,0 +1,42 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+###########
+# CHUNKED IO
+###########
+
+# CSV or Parquet by file extension, read and written a chunk at a time
+
+def read_chunks(path, chunk_size, columns=None, dtype=None):
+    if path.endswith(".parquet"):
+        parquet_file = pq.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            chunk = batch.to_pandas()
+            yield chunk.astype({col: dtype[col] for col in chunk.columns if col in dtype}) if dtype else chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns, dtype=dtype)
+
+
+class PredictionWriter:
+    def __init__(self, path):
+        self.path = path
+        self.is_parquet = path.endswith(".parquet")
+        self._parquet_writer = None
+        self._header_written = False
+
+    def write(self, predictions):
+        if self.is_parquet:
+            table = pa.Table.from_pandas(predictions, preserve_index=False)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, table.schema)
+            self._parquet_writer.write_table(table)
+        else:
+            predictions.to_csv(self.path, mode="a" if self._header_written else "w",
+                               header=not self._header_written, index=False)
+            self._header_written = True
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
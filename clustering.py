@@ -0,0 +1,322 @@
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from threadpoolctl import threadpool_limits
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import silhouette_score, calinski_harabasz_score, adjusted_rand_score
+from sklearn.preprocessing import MinMaxScaler
+
+from chunked_io import read_chunks, PredictionWriter
+from dataset_store import append_table
+from model_registry import load_model
+from parallel import process_pool_context
+
+
+# What 04_spotify_clustering.py ends up clustering on: grab_col_names' num_cols
+# minus its exclusions, plus time_signature
+CLUSTER_COLUMNS = ["year", "danceability", "energy", "loudness", "acousticness", "instrumentalness",
+                   "liveness", "valence", "tempo", "duration_ms", "time_signature"]
+
+# Inputs of 04's pc1/pc2 projection behind pc_segment
+PCA_COLUMNS = ["mode", "key", "speechiness", "liveness", "popularity"]
+
+K_CANDIDATES = range(2, 31)
+SAMPLE_SIZE = 100_000
+SILHOUETTE_SAMPLE_SIZE = 10_000
+
+BUNDLE_PATH = "./models/clustering_bundle.pkl"
+
+CHUNK_SIZE = 100_000
+BATCH_SIZE = 4096
+
+
+###########
+# STRATIFIED SUBSAMPLE
+###########
+
+def stratified_sample(dataframe, strata, size, random_state=42):
+    if size >= len(dataframe):
+        return dataframe
+
+    # Same fraction from every stratum (e.g. genre), so small genres keep their share
+    return dataframe.groupby(strata, group_keys=False, observed=True).sample(frac=size / len(dataframe),
+                                                                             random_state=random_state)
+
+
+###########
+# K SELECTION
+###########
+
+_sample = None
+
+
+def _init_worker(X, threads):
+    # The sample is shipped once per worker; BLAS/OpenMP threads are capped so
+    # workers x threads does not oversubscribe the cores
+    global _sample
+    _sample = X
+    threadpool_limits(threads)
+
+
+def evaluate_k(k, random_state=42, silhouette_size=SILHOUETTE_SAMPLE_SIZE):
+    X = _sample
+
+    start = time.perf_counter()
+    model = MiniBatchKMeans(n_clusters=k, batch_size=4096, n_init=3, random_state=random_state).fit(X)
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    silhouette = silhouette_score(X, model.labels_, sample_size=min(silhouette_size, len(X)),
+                                  random_state=random_state)
+    calinski_harabasz = calinski_harabasz_score(X, model.labels_)
+    score_time = time.perf_counter() - start
+
+    return {"k": k,
+            "inertia": model.inertia_,
+            "silhouette": silhouette,
+            "calinski_harabasz": calinski_harabasz,
+            "fit_s": fit_time,
+            "score_s": score_time}
+
+
+def select_k(X, k_values=K_CANDIDATES, strata=None, sample_size=SAMPLE_SIZE, workers=None,
+             silhouette_size=SILHOUETTE_SAMPLE_SIZE, random_state=42):
+    start = time.perf_counter()
+
+    X = pd.DataFrame(X)
+    if strata is not None:
+        X = stratified_sample(X, strata, sample_size, random_state)
+    elif sample_size < len(X):
+        X = X.sample(sample_size, random_state=random_state)
+    X = np.ascontiguousarray(X.to_numpy(dtype=np.float64))
+
+    workers = workers or os.cpu_count()
+    threads = max(1, os.cpu_count() // workers)
+
+    # Largest k first: they take longest, so the pool stays busy until the end
+    k_values = sorted(k_values, reverse=True)
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context(), initializer=_init_worker,
+                             initargs=(X, threads)) as executor:
+        results = list(executor.map(evaluate_k, k_values, [random_state] * len(k_values),
+                                    [silhouette_size] * len(k_values)))
+
+    results = pd.DataFrame(results).sort_values("k").reset_index(drop=True)
+    print(f"Evaluated {len(results)} k values on {len(X)} rows with {workers} workers "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    return results
+
+
+def elbow_k(results):
+    # Point of the normalized inertia curve farthest from the chord between its ends
+    k = results["k"].to_numpy(dtype=float)
+    inertia = results["inertia"].to_numpy(dtype=float)
+
+    x = (k - k.min()) / ((k.max() - k.min()) or 1)
+    y = (inertia - inertia.min()) / ((inertia.max() - inertia.min()) or 1)
+
+    return int(k[np.argmax((1 - x) - y)])
+
+
+def final_fit(X, n_clusters, n_init=50, random_state=42):
+    start = time.perf_counter()
+    kmeans = KMeans(n_clusters=n_clusters, n_init=n_init, random_state=random_state).fit(X)
+    print(f"Final KMeans(k={n_clusters}, n_init={n_init}) on {len(X)} rows in {time.perf_counter() - start:.2f} s")
+    return kmeans
+
+
+###########
+# STREAMING CLUSTERING
+###########
+
+# For track dumps that do not fit in memory: every pass reads the file chunk by
+# chunk, so memory depends on chunk_size, not on the catalogue size.
+#   pass 1: MinMaxScaler.partial_fit (column min/max)
+#   pass 2: MiniBatchKMeans.partial_fit on shuffled mini-batches, epochs times
+#   pass 3: predict and write labels chunk by chunk
+
+def read_feature_chunks(path, columns, chunk_size):
+    for chunk in read_chunks(path, chunk_size, columns):
+        yield chunk[columns].dropna()
+
+
+def stream_fit(path, columns=CLUSTER_COLUMNS, n_clusters=5, chunk_size=CHUNK_SIZE, batch_size=BATCH_SIZE,
+               epochs=1, random_state=42):
+    start = time.perf_counter()
+    rng = np.random.default_rng(random_state)
+
+    scaler = MinMaxScaler()
+    for chunk in read_feature_chunks(path, columns, chunk_size):
+        scaler.partial_fit(chunk)
+
+    model = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=random_state)
+    for epoch in range(epochs):
+        for chunk in read_feature_chunks(path, columns, chunk_size):
+            X = scaler.transform(chunk)[rng.permutation(len(chunk))]
+
+            # Centroids are seeded by a full mini-batch fit on the first chunk,
+            # then refined by partial_fit on every later mini-batch
+            if not hasattr(model, "cluster_centers_"):
+                model.fit(X)
+                continue
+
+            for batch_start in range(0, len(X), batch_size):
+                model.partial_fit(X[batch_start:batch_start + batch_size])
+
+    print(f"Streamed MiniBatchKMeans(k={n_clusters}) over {path}: {epochs} epoch(s) "
+          f"in {time.perf_counter() - start:.2f} s")
+
+    return scaler, model
+
+
+def stream_assign(path, scaler, model, output_path=None, columns=CLUSTER_COLUMNS, id_columns=("track_id",),
+                  chunk_size=CHUNK_SIZE, keep_labels=False):
+    start = time.perf_counter()
+    writer = PredictionWriter(output_path) if output_path else None
+    labels, rows = [], 0
+
+    try:
+        for chunk in read_chunks(path, chunk_size, list(id_columns) + columns):
+            chunk = chunk.dropna(subset=columns)
+            chunk_labels = model.predict(scaler.transform(chunk[columns])).astype(np.int8)
+            rows += len(chunk)
+
+            if writer is not None:
+                writer.write(pd.DataFrame({**{col: chunk[col].to_numpy() for col in id_columns},
+                                           "cluster": chunk_labels}))
+            if keep_labels:
+                labels.append(chunk_labels)
+    finally:
+        if writer is not None:
+            writer.close()
+
+    print(f"Assigned {rows} tracks in {time.perf_counter() - start:.2f} s")
+
+    return np.concatenate(labels) if keep_labels else rows
+
+
+def compare_with_full_batch(path, n_clusters=5, columns=CLUSTER_COLUMNS, n_init=50, **stream_kwargs):
+    # Agreement of the streamed labels with 04's full-batch KMeans on data that still fits in memory
+    # read_chunks like the streamed passes, so CSV and Parquet inputs both work
+    chunk_size = stream_kwargs.pop("chunk_size", CHUNK_SIZE)
+    dataframe = pd.concat(read_chunks(path, chunk_size, columns), ignore_index=True).dropna()[columns]
+    full_model = final_fit(MinMaxScaler().fit_transform(dataframe), n_clusters, n_init=n_init)
+
+    scaler, model = stream_fit(path, columns, n_clusters, chunk_size=chunk_size, **stream_kwargs)
+    stream_labels = stream_assign(path, scaler, model, columns=columns, id_columns=(), chunk_size=chunk_size,
+                                  keep_labels=True)
+
+    # Where the data has no clear cluster structure the partitions can differ while
+    # fitting equally well, so the inertia ratio is reported alongside the ARI
+    ari = adjusted_rand_score(full_model.labels_, stream_labels)
+    inertia_ratio = -model.score(scaler.transform(dataframe)) / full_model.inertia_
+    print(f"Streaming vs full-batch: adjusted Rand index {ari:.4f}, inertia ratio {inertia_ratio:.4f}")
+    return ari, inertia_ratio
+
+
+###########
+# CLUSTERING BUNDLE
+###########
+
+# Everything 04_spotify_clustering.py fits, so new tracks get the same cluster
+# and pc_segment without re-clustering (and without reshuffled cluster ids)
+
+def make_bundle(cluster_columns, minmax_scaler, kmeans, pca_columns, pca_scaler, pca, pc_binner):
+    return {"cluster_columns": list(cluster_columns),
+            "minmax_scaler": minmax_scaler,
+            "kmeans": kmeans,
+            "pca_columns": list(pca_columns),
+            "pca_scaler": pca_scaler,
+            "pca": pca,
+            "pc_binner": pc_binner}
+
+
+def save_bundle(bundle, path=BUNDLE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    joblib.dump(bundle, path)
+
+
+def assign_clusters(dataframe, bundle):
+    X = bundle["minmax_scaler"].transform(dataframe[bundle["cluster_columns"]])
+    if hasattr(bundle["kmeans"], "feature_names_in_"):
+        X = pd.DataFrame(X, columns=bundle["cluster_columns"])
+    cluster = bundle["kmeans"].predict(X)
+
+    pcs = bundle["pca"].transform(bundle["pca_scaler"].transform(dataframe[bundle["pca_columns"]]))
+    scores = bundle["pc_binner"].transform(pd.DataFrame(pcs, columns=["pc1", "pc2"]))
+    pc_segment = scores["pc1"].to_numpy() * 10 + scores["pc2"].to_numpy()
+
+    return dataframe.assign(cluster=cluster, pc_segment=pc_segment)
+
+
+def assign_new_tracks(input_path, bundle_name="clustering_bundle", table="spotify_clustered"):
+    start = time.perf_counter()
+    df_new = pd.read_csv(input_path)
+
+    df_new = assign_clusters(df_new, load_model(bundle_name))
+    appended = append_table(table, df_new, unique_column="track_id")
+
+    print(f"Assigned {len(df_new)} tracks, appended {appended} new ones to {table} "
+          f"in {time.perf_counter() - start:.2f} s")
+    return df_new
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Spotify track clustering")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    select_parser = subparsers.add_parser("select", help="evaluate candidate k values in parallel")
+    select_parser.add_argument("--input", default="./datasets/spotify_final.csv")
+    select_parser.add_argument("--k-min", type=int, default=min(K_CANDIDATES))
+    select_parser.add_argument("--k-max", type=int, default=max(K_CANDIDATES))
+    select_parser.add_argument("--sample-size", type=int, default=SAMPLE_SIZE)
+    select_parser.add_argument("--strata", default="genre", help="column to stratify the subsample on")
+    select_parser.add_argument("--workers", type=int, default=None)
+    select_parser.add_argument("--output", default=None, help="CSV for the per-k report")
+
+    stream_parser = subparsers.add_parser("stream", help="chunked MiniBatchKMeans fit and label passes")
+    stream_parser.add_argument("--input", default="./datasets/spotify_final.csv")
+    stream_parser.add_argument("--output", default="./datasets/spotify_stream_clusters.csv",
+                               help="CSV or Parquet with track_id and cluster")
+    stream_parser.add_argument("--k", type=int, default=5)
+    stream_parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    stream_parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    stream_parser.add_argument("--epochs", type=int, default=1)
+    stream_parser.add_argument("--compare", action="store_true",
+                               help="also fit full-batch KMeans in memory and report the ARI")
+    stream_parser.add_argument("--n-init", type=int, default=50, help="full-batch KMeans inits for --compare")
+
+    assign_parser = subparsers.add_parser("assign", help="label new tracks with the saved bundle and "
+                                                         "append them to the dataset store")
+    assign_parser.add_argument("input", help="CSV of new tracks in the spotify_final format")
+
+    args = parser.parse_args()
+
+    if args.command == "select":
+        df_spoti = pd.read_csv(args.input, usecols=CLUSTER_COLUMNS + [args.strata])
+        X = pd.DataFrame(MinMaxScaler().fit_transform(df_spoti[CLUSTER_COLUMNS]), columns=CLUSTER_COLUMNS)
+
+        selection = select_k(X, range(args.k_min, args.k_max + 1), strata=df_spoti[args.strata],
+                             sample_size=args.sample_size, workers=args.workers)
+        print(selection.to_string(index=False))
+        print(f"Elbow: k={elbow_k(selection)}")
+
+        if args.output:
+            selection.to_csv(args.output, index=False)
+
+    elif args.command == "stream":
+        stream_kwargs = {"chunk_size": args.chunk_size, "batch_size": args.batch_size, "epochs": args.epochs}
+
+        if args.compare:
+            compare_with_full_batch(args.input, args.k, n_init=args.n_init, **stream_kwargs)
+        else:
+            scaler, model = stream_fit(args.input, n_clusters=args.k, **stream_kwargs)
+            stream_assign(args.input, scaler, model, args.output, chunk_size=args.chunk_size)
+
+    elif args.command == "assign":
+        assign_new_tracks(args.input)
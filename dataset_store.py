@@ -0,0 +1,184 @@
+import os
+import glob
+import time
+import argparse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from segment_export import SEGMENT_DIR, read_segments
+
+
+STORE_DIR = "./datasets/store"
+
+TABLES = {"spotify_clustered": "./datasets/spotify_clustered.csv",
+          "mental_final": "./datasets/mental_final.csv",
+          "spotify_model": "./datasets/spotify_model.csv",
+          "segments": SEGMENT_DIR}
+
+# Rows appended with append_table are told apart from the source rows by these keys
+# when the table is rebuilt (clustering.py assign appends tracks by track_id)
+TABLE_KEYS = {"spotify_clustered": "track_id"}
+
+# Everything not listed is compacted by kind: float64 -> float32, ints downcast,
+# repetitive strings -> category
+COLUMN_DTYPES = {"genre": "category",
+                 "artist_name": "category",
+                 "fav_genre": "category",
+                 "cluster": "int8",
+                 "pc_segment": "int8",
+                 "segment": "int8"}
+
+CATEGORY_MAX_RATIO = 0.5
+
+
+###########
+# DTYPES
+###########
+
+def compact_dtypes(dataframe):
+    dataframe = dataframe.copy()
+
+    for col in dataframe.columns:
+        series = dataframe[col]
+
+        if col in COLUMN_DTYPES:
+            dataframe[col] = series.astype(COLUMN_DTYPES[col])
+        elif pd.api.types.is_float_dtype(series):
+            dataframe[col] = series.astype("float32")
+        elif pd.api.types.is_integer_dtype(series):
+            dataframe[col] = pd.to_numeric(series, downcast="integer")
+        elif series.dtype == object and series.nunique() <= CATEGORY_MAX_RATIO * len(series):
+            dataframe[col] = series.astype("category")
+
+    return dataframe
+
+
+###########
+# BUILD
+###########
+
+def read_source(name):
+    source = TABLES[name]
+
+    if name == "segments":
+        return read_segments(source)
+
+    return pd.read_csv(source) if os.path.exists(source) else None
+
+
+def store_path(name, store_dir=STORE_DIR):
+    return os.path.join(store_dir, f"{name}.feather")
+
+
+def part_paths(name, store_dir=STORE_DIR):
+    return sorted(glob.glob(os.path.join(store_dir, f"{name}.part-*.feather")))
+
+
+def appended_rows(name, source, store_dir=STORE_DIR):
+    # Rows of the part files the rebuilt source does not already have, so a rebuild keeps them
+    parts = part_paths(name, store_dir)
+    if not parts:
+        return None
+
+    appended = pd.concat([feather.read_table(path).to_pandas() for path in parts], ignore_index=True)
+    key = TABLE_KEYS.get(name)
+    if key is None:
+        print(f"Warning: {name} has no key to match appended rows against the source, "
+              f"dropping {len(appended)} appended rows")
+        return None
+
+    appended = appended[~appended[key].isin(source[key])]
+    print(f"{name}: keeping {len(appended)} appended rows not in {TABLES[name]}")
+    return appended.reindex(columns=source.columns)
+
+
+def build_store(names=None, store_dir=STORE_DIR):
+    os.makedirs(store_dir, exist_ok=True)
+
+    for name in names or TABLES:
+        start = time.perf_counter()
+        dataframe = read_source(name)
+        if dataframe is None:
+            print(f"Skipping {name}: {TABLES[name]} not found")
+            continue
+
+        csv_memory = dataframe.memory_usage(deep=True).sum()
+        dataframe = compact_dtypes(pd.concat([dataframe, appended_rows(name, dataframe, store_dir)],
+                                             ignore_index=True))
+
+        # Uncompressed Feather (Arrow IPC) so readers can memory-map it
+        table = pa.Table.from_pandas(dataframe, preserve_index=False)
+        feather.write_feather(table, store_path(name, store_dir), compression="uncompressed")
+
+        # The appended rows now live in the base table
+        for path in part_paths(name, store_dir):
+            os.remove(path)
+
+        print(f"{name}: {len(dataframe)} rows, {csv_memory / 1024**2:.1f} MB -> "
+              f"{dataframe.memory_usage(deep=True).sum() / 1024**2:.1f} MB in memory, "
+              f"{time.perf_counter() - start:.2f} s")
+
+
+###########
+# APPEND
+###########
+
+# Feather files cannot be appended to, so new rows go to a small part file next
+# to the table: the write is O(new rows) and load_table reads base + parts
+
+def append_table(name, dataframe, unique_column=None, store_dir=STORE_DIR):
+    path = store_path(name, store_dir)
+    if not os.path.exists(path):
+        build_store([name], store_dir)
+
+    schema = feather.read_table(path, memory_map=True).schema
+
+    if unique_column is not None:
+        existing = load_table(name, columns=[unique_column], store_dir=store_dir)[unique_column]
+        dataframe = dataframe[~dataframe[unique_column].isin(existing)].drop_duplicates(unique_column)
+
+    if dataframe.empty:
+        return 0
+
+    table = pa.Table.from_pandas(compact_dtypes(dataframe[schema.names]), preserve_index=False)
+    feather.write_feather(table.cast(schema), os.path.join(store_dir, f"{name}.part-{time.time_ns()}.feather"),
+                          compression="uncompressed")
+
+    return len(dataframe)
+
+
+###########
+# LOAD
+###########
+
+def load_table(name, columns=None, store_dir=STORE_DIR):
+    path = store_path(name, store_dir)
+
+    if os.path.exists(path):
+        tables = [feather.read_table(table_path, columns=columns, memory_map=True)
+                  for table_path in [path] + part_paths(name, store_dir)]
+        table = tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+        return table.to_pandas(split_blocks=True)
+
+    # Store not built yet: same dtypes, straight from the CSVs
+    dataframe = read_source(name)
+    if dataframe is None:
+        raise FileNotFoundError(f"{name}: neither {path} nor {TABLES[name]} found")
+    if columns is not None:
+        dataframe = dataframe[columns]
+    return compact_dtypes(dataframe)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert the app datasets to a compact Feather store")
+    parser.add_argument("tables", nargs="*", help=f"tables to build, default all of {', '.join(TABLES)}")
+    parser.add_argument("--store-dir", default=STORE_DIR)
+    args = parser.parse_args()
+
+    unknown = set(args.tables) - set(TABLES)
+    if unknown:
+        parser.error(f"unknown tables: {', '.join(sorted(unknown))}")
+
+    build_store(args.tables, args.store_dir)
@@ -0,0 +1,58 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+
+TAXONOMY_PATH = "./genre_taxonomy.json"
+
+
+###########
+# GENRE TAXONOMY
+###########
+
+# genre_taxonomy.json lists, per dataset, the genres to drop and the nine
+# buckets with their raw genres. A genre listed under several buckets goes to
+# the first one, as with the sequential isin/.loc remaps it replaces.
+
+def load_taxonomy(name, path=TAXONOMY_PATH):
+    with open(path) as f:
+        return json.load(f)[name]
+
+
+def build_mapping(buckets):
+    mapping = {}
+    for bucket, genres in buckets.items():
+        for genre in genres:
+            mapping.setdefault(genre, bucket)
+    return mapping
+
+
+def remap_genres(series, mapping, report=True):
+    # One pass: factorize to codes, map each distinct genre once, gather back
+    codes, uniques = pd.factorize(series)
+    if not len(uniques):
+        return series.copy()
+
+    mapped = np.array([mapping.get(genre, genre) for genre in uniques], dtype=object)
+
+    if report:
+        counts = pd.Series(np.bincount(codes[codes >= 0], minlength=len(uniques)), index=uniques)
+        unmapped = counts[[genre not in mapping and genre not in mapping.values() for genre in uniques]]
+        if not unmapped.empty:
+            summary = ", ".join(f"{genre} ({count})" for genre, count in unmapped.items())
+            print(f"Unmapped {series.name} values kept as is: {summary}")
+
+    # Missing values (code -1) stay missing
+    return pd.Series(mapped[codes], index=series.index, name=series.name).where(codes >= 0, series)
+
+
+def apply_taxonomy(dataframe, column, name, path=TAXONOMY_PATH, report=True):
+    taxonomy = load_taxonomy(name, path)
+
+    if taxonomy["drop"]:
+        dataframe = dataframe[~dataframe[column].isin(taxonomy["drop"])]
+
+    dataframe = dataframe.copy()
+    dataframe[column] = remap_genres(dataframe[column], build_mapping(taxonomy["buckets"]), report)
+    return dataframe
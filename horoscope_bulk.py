@@ -0,0 +1,146 @@
+import os
+import time
+import random
+import asyncio
+import argparse
+import datetime
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from horoscope_webscraping import (sign_list, rating_categories, BASE_URL, REQUEST_TIMEOUT, fetch_page,
+                                   parse_star_ratings, star_ratings_url, date_token)
+
+
+###########
+# ASYNC BULK FETCH
+###########
+
+# requests is already a dependency, so the async layer drives a pooled
+# requests.Session from a thread pool instead of adding an async HTTP client.
+
+def date_range(start, end):
+    return [start + datetime.timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+def make_session(pool_size):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+async def _fetch_one(loop, fetch, io_executor, semaphore, url, retries, backoff):
+    for attempt in range(retries + 1):
+        try:
+            async with semaphore:
+                return await loop.run_in_executor(io_executor, fetch, url)
+
+        except requests.RequestException as e:
+            # 4xx other than rate limiting will not fix itself
+            status = getattr(e.response, "status_code", None)
+            if attempt == retries or (status is not None and 400 <= status < 500 and status != 429):
+                raise
+            await asyncio.sleep(backoff * 2 ** attempt * (1 + random.random()))
+
+
+async def _fetch_ratings(loop, fetch, io_executor, parse_executor, semaphore, sign, day, date_format,
+                         base_url, retries, backoff):
+    row = {"sign": sign, "date": day, "error": None}
+
+    try:
+        url = star_ratings_url(sign, date_format(day), base_url)
+        content = await _fetch_one(loop, fetch, io_executor, semaphore, url, retries, backoff)
+        row.update(await loop.run_in_executor(parse_executor, parse_star_ratings, content))
+
+        missing = [category for category in rating_categories if category not in row]
+        if missing:
+            raise ValueError(f"star ratings missing from the page: {missing}")
+    except Exception as e:
+        row["error"] = str(e)
+
+    return row
+
+
+async def fetch_star_ratings_async(signs=sign_list, dates=None, concurrency=8, timeout=REQUEST_TIMEOUT,
+                                   retries=3, backoff=0.5, base_url=BASE_URL, date_format=date_token,
+                                   parse_executor=None, fetcher=None):
+    dates = dates or [datetime.date.today()]
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    with make_session(concurrency) as session, ThreadPoolExecutor(max_workers=concurrency) as io_executor:
+        def session_fetch(url):
+            response = session.get(url, timeout=timeout)
+            response.raise_for_status()
+            return response.content
+
+        # fetcher(url) -> page content replaces the pooled session, e.g. a StarRatingCache's fetcher
+        fetch = fetcher or session_fetch
+        rows = await asyncio.gather(*[
+            _fetch_ratings(loop, fetch, io_executor, parse_executor, semaphore, sign, day, date_format,
+                           base_url, retries, backoff)
+            for day in dates for sign in signs])
+
+    ratings_df = pd.DataFrame(rows, columns=["sign", "date"] + rating_categories + ["error"])
+    ratings_df[rating_categories] = ratings_df[rating_categories].astype("Int8")
+
+    return ratings_df
+
+
+def fetch_star_ratings_bulk(signs=sign_list, dates=None, **kwargs):
+    start = time.perf_counter()
+    ratings_df = asyncio.run(fetch_star_ratings_async(signs, dates, **kwargs))
+    elapsed = time.perf_counter() - start
+
+    failed = ratings_df["error"].notna().sum()
+    print(f"Fetched {len(ratings_df) - failed}/{len(ratings_df)} star ratings in {elapsed:.2f} s")
+
+    return ratings_df
+
+
+def warm_cache(cache, dates=None, **kwargs):
+    # The cache's default fetch_page is replaced by the pooled session; a custom fetcher is kept
+    fetcher = None if cache.fetcher is fetch_page else cache.fetcher
+    ratings_df = fetch_star_ratings_bulk(dates=dates, base_url=cache.base_url, fetcher=fetcher, **kwargs)
+
+    # Only complete rows: the app reads every category of a cached rating
+    complete = ratings_df["error"].isna() & ratings_df[rating_categories].notna().all(axis=1)
+    for row in ratings_df[complete].itertuples(index=False):
+        cache.put(row.sign, row.date, {category: int(getattr(row, category)) for category in rating_categories})
+
+    return ratings_df
+
+
+if __name__ == "__main__":
+    today = datetime.date.today()
+
+    parser = argparse.ArgumentParser(description="Fetch star ratings for every sign over a date range")
+    parser.add_argument("--start", type=datetime.date.fromisoformat, default=today - datetime.timedelta(days=1))
+    parser.add_argument("--end", type=datetime.date.fromisoformat, default=today + datetime.timedelta(days=1))
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--timeout", type=float, default=REQUEST_TIMEOUT)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--date-format", default=None,
+                        help="strftime pattern for archive pages; default uses yesterday/today/tomorrow")
+    parser.add_argument("--parse-processes", type=int, default=0, help="parse pages in a process pool")
+    parser.add_argument("--output", default="./cache/star_ratings.csv")
+    args = parser.parse_args()
+
+    date_format = (lambda day: day.strftime(args.date_format)) if args.date_format else date_token
+    parse_executor = ProcessPoolExecutor(args.parse_processes) if args.parse_processes else None
+
+    try:
+        ratings_df = fetch_star_ratings_bulk(dates=date_range(args.start, args.end), concurrency=args.concurrency,
+                                             retries=args.retries, timeout=args.timeout, base_url=args.base_url,
+                                             date_format=date_format, parse_executor=parse_executor)
+    finally:
+        if parse_executor is not None:
+            parse_executor.shutdown()
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    ratings_df.to_csv(args.output, index=False)
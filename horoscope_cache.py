@@ -0,0 +1,148 @@
+import os
+import json
+import time
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from horoscope_webscraping import (sign_list, rating_categories, BASE_URL, fetch_page, parse_star_ratings,
+                                   star_ratings_url, date_token)
+
+
+# Used only when a sign has never been fetched successfully: the middle of the 1-5 star scale
+DEFAULT_RATINGS = {"sex": 3, "hustle": 3, "vibe": 3, "success": 3}
+
+
+def is_complete(ratings):
+    return bool(ratings) and all(category in ratings for category in rating_categories)
+
+
+###########
+# STAR RATING CACHE
+###########
+
+# Ratings change once a day per sign, so they are cached per (sign, date) and
+# persisted to disk. Readers never touch the network: they get the cached day,
+# else the last known rating for the sign, while fetching happens in background
+# threads.
+
+class StarRatingCache:
+    def __init__(self, path="./cache/horoscope_ratings.json", fetcher=fetch_page, base_url=BASE_URL,
+                 max_workers=len(sign_list), retry_after=5 * 60):
+        self.path = path
+        self.fetcher = fetcher
+        self.base_url = base_url
+        self.max_workers = max_workers
+        self.retry_after = retry_after
+        self._ratings = {}
+        self._pending = set()
+        self._failed_at = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="horoscope")
+        self._refresher = None
+        self._stop = threading.Event()
+        self._load()
+
+    @staticmethod
+    def key(sign, day):
+        return f"{sign.lower()}|{day.isoformat()}"
+
+    def _load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self._ratings = json.load(f)
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._ratings, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def last_known(self, sign, day=None):
+        prefix = f"{sign.lower()}|"
+        latest = self.key(sign, day or datetime.date.today())
+        with self._lock:
+            keys = sorted(key for key in self._ratings if key.startswith(prefix) and key <= latest
+                          and is_complete(self._ratings[key]))
+        return self._ratings[keys[-1]] if keys else None
+
+    def get(self, sign, day=None):
+        day = day or datetime.date.today()
+        ratings = self._ratings.get(self.key(sign, day))
+
+        # Entries written before ratings were validated may lack categories the app reads
+        if not is_complete(ratings):
+            self.fetch_async(sign, day)
+            ratings = self.last_known(sign, day) or DEFAULT_RATINGS
+
+        return ratings
+
+    def fetch(self, sign, day=None):
+        day = day or datetime.date.today()
+        sign = sign.lower()
+
+        try:
+            url = star_ratings_url(sign, date_token(day), self.base_url)
+            ratings = parse_star_ratings(self.fetcher(url))
+
+            if not is_complete(ratings):
+                missing = [category for category in rating_categories if category not in (ratings or {})]
+                raise ValueError(f"star ratings missing from the page: {missing}")
+
+            self.put(sign, day, ratings)
+            return ratings
+
+        except Exception as e:
+            print(f"Star ratings fetch failed for {sign} {day}: {e}")
+            with self._lock:
+                self._failed_at[self.key(sign, day)] = time.monotonic()
+            return None
+
+        finally:
+            with self._lock:
+                self._pending.discard(self.key(sign, day))
+
+    def put(self, sign, day, ratings):
+        with self._lock:
+            self._ratings[self.key(sign, day)] = ratings
+            self._save()
+
+    def fetch_async(self, sign, day=None):
+        day = day or datetime.date.today()
+        key = self.key(sign, day)
+
+        with self._lock:
+            # Reruns must not hammer a site that is down: wait retry_after seconds between attempts
+            failed_at = self._failed_at.get(key)
+            if key in self._pending or (failed_at is not None and time.monotonic() - failed_at < self.retry_after):
+                return None
+            self._pending.add(key)
+
+        return self._executor.submit(self.fetch, sign, day)
+
+    def prefetch(self, day=None, signs=sign_list, force=False):
+        day = day or datetime.date.today()
+        futures = [self.fetch_async(sign, day) for sign in signs
+                   if force or not is_complete(self._ratings.get(self.key(sign, day)))]
+        return [future.result() for future in futures if future is not None]
+
+    def start_refresher(self, interval=30 * 60):
+        if self._refresher is not None:
+            return self._refresher
+
+        # Today and tomorrow so the cache is already warm when the date rolls over
+        def refresh():
+            while not self._stop.is_set():
+                today = datetime.date.today()
+                self.prefetch(today)
+                self.prefetch(today + datetime.timedelta(days=1))
+                self._stop.wait(interval)
+
+        self._refresher = threading.Thread(target=refresh, name="horoscope-refresher", daemon=True)
+        self._refresher.start()
+        return self._refresher
+
+    def stop(self):
+        self._stop.set()
+        self._executor.shutdown(wait=False)
@@ -1,31 +1,101 @@
+import datetime
+
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml.html
+except ImportError:
+    lxml = None
 
 sign_list = ["aries", "taurus", "gemini", "cancer", "leo", "virgo","libra",
              "scorpio", "sagittarius", "capricorn", "aquarius", "pisces"]
 
-def get_star_ratings(sign, date="today"):
+rating_categories = ["sex", "hustle", "vibe", "success"]
+
+BASE_URL = "https://www.horoscope.com"
+REQUEST_TIMEOUT = 5
+
+
+def star_ratings_url(sign, date="today", base_url=BASE_URL):
+    return f"{base_url}/star-ratings/{date}/{sign}"
+
+
+def date_token(day):
+    # horoscope.com serves star ratings under relative names only
+    offset = (day - datetime.date.today()).days
+    tokens = {-1: "yesterday", 0: "today", 1: "tomorrow"}
+    if offset not in tokens:
+        raise ValueError(f"No star ratings page for {day}, only yesterday/today/tomorrow are available")
+    return tokens[offset]
+
+
+def fetch_page(url, timeout=REQUEST_TIMEOUT):
+    response = requests.get(url, timeout=timeout)
+    response.raise_for_status()
+    return response.content
+
+
+###########
+# PARSING
+###########
+
+# A filled star is an <i> carrying both classes, in any order and among any others.
+# Every backend counts them the same way, and a repeated category header overrides
+# the earlier one (the last header wins).
+STAR_CLASSES = ["icon-star-filled", "highlight"]
+STAR_SELECTOR = "i" + "".join(f".{name}" for name in STAR_CLASSES)
+STAR_XPATH = ".//i[{}]".format(" and ".join(
+    f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')" for name in STAR_CLASSES))
+
+
+def _parse_soup(content, parse_only=None):
+    soup = BeautifulSoup(content, "html.parser", parse_only=parse_only)
 
-    url = f"https://www.horoscope.com/star-ratings/{date}/{sign}"
-    
-    response = requests.get(url)
-    
-    soup = BeautifulSoup(response.content, "html.parser")
-    
-    rating_tags = soup.find_all("h3")
-    
     ratings = {}
-    for tag in rating_tags:
-        category = tag.text.split()[0].lower()
-        if category in ["sex", "hustle", "vibe", "success"]:
-            highlighted_stars = tag.find_all("i", class_="icon-star-filled highlight")
-            stars = len(highlighted_stars)
-            # ratings[category] = f"{stars}/5"
-            ratings[category] = f"{stars}"
-            
-            # sex_star = int(ratings.get("sex"))
-            hustle_star =ratings.get("hustle")
-            vibe_star = ratings.get("vibe")
-            # success_star = int(rating.get("success"))
-    
-    return hustle_star, vibe_star
\ No newline at end of file
+    for tag in soup.find_all("h3"):
+        words = tag.text.split()
+        category = words[0].lower() if words else None
+        if category in rating_categories:
+            ratings[category] = len(tag.select(STAR_SELECTOR))
+
+    return ratings
+
+
+def _parse_strainer(content):
+    # Only <h3> subtrees are built, the rest of the page is skipped by the tokenizer
+    return _parse_soup(content, parse_only=SoupStrainer("h3"))
+
+
+def _parse_lxml(content):
+    tree = lxml.html.fromstring(content)
+
+    ratings = {}
+    for tag in tree.iter("h3"):
+        words = tag.text_content().split()
+        category = words[0].lower() if words else None
+        if category in rating_categories:
+            ratings[category] = len(tag.xpath(STAR_XPATH))
+
+    return ratings
+
+
+parsers = {"lxml": _parse_lxml, "strainer": _parse_strainer, "soup": _parse_soup}
+
+
+def parse_star_ratings(content, backend=None):
+    if backend is None:
+        backend = "lxml" if lxml is not None else "strainer"
+
+    try:
+        return parsers[backend](content)
+    except Exception:
+        if backend == "soup":
+            raise
+        # Fall back to the full html.parser tree on anything the fast paths cannot handle
+        return _parse_soup(content)
+
+
+def get_star_ratings(sign, date="today", fetcher=fetch_page, base_url=BASE_URL, backend=None):
+    # All four categories (sex, hustle, vibe, success) from a single parse
+    return parse_star_ratings(fetcher(star_ratings_url(sign, date, base_url)), backend)
@@ -0,0 +1,187 @@
+import os
+import json
+import time
+import random
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+
+from spotify_features import AUDIO_FEATURE_COLUMNS, EMBEDDING_COLUMNS, embed_tracks
+from nearest_recommender import NearestTrackIndex, feature_range, scale_query
+
+
+INDEX_DIR = "./models/track_ivf"
+
+ARRAYS = ["centroids", "list_offsets", "vectors", "track_ids"]
+
+
+###########
+# IVF INDEX
+###########
+
+# Approximate nearest tracks for catalogues too large for exact search.
+# A k-means coarse quantizer splits the scaled vectors into n_lists cells and
+# the vectors are stored sorted by cell, so each inverted list is one
+# contiguous slice (CSR offsets). A query scans only the nprobe cells whose
+# centroids are closest: more cells, higher recall, slower query.
+
+class IVFIndex:
+    def __init__(self, centroids, list_offsets, vectors, track_ids, offset, scale, nprobe=8):
+        self.centroids = centroids
+        self.list_offsets = list_offsets
+        self.vectors = vectors
+        self.track_ids = track_ids
+        self.offset = np.asarray(offset, dtype=np.float32)
+        self.scale = np.asarray(scale, dtype=np.float32)
+        self.nprobe = nprobe
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    @classmethod
+    def build(cls, vectors, track_ids, n_lists=None, train_size=None, nprobe=8, random_state=42):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        offset, scale = feature_range(vectors)
+        scaled = (vectors - offset) / scale
+
+        n_lists = min(n_lists or max(1, int(np.sqrt(len(scaled)))), len(scaled))
+        train_size = min(train_size or 256 * n_lists, len(scaled))
+        rng = np.random.default_rng(random_state)
+        train = scaled[rng.choice(len(scaled), train_size, replace=False)]
+
+        quantizer = MiniBatchKMeans(n_clusters=n_lists, batch_size=4096, n_init=3, random_state=random_state)
+        quantizer.fit(train)
+        labels = quantizer.predict(scaled)
+
+        order = np.argsort(labels, kind="stable")
+        list_offsets = np.r_[0, np.cumsum(np.bincount(labels, minlength=n_lists))].astype(np.int64)
+
+        return cls(quantizer.cluster_centers_.astype(np.float32), list_offsets,
+                   np.ascontiguousarray(scaled[order]), np.asarray(track_ids).astype(str)[order],
+                   offset, scale, nprobe)
+
+    @classmethod
+    def from_tracks(cls, dataframe, **kwargs):
+        return cls.build(embed_tracks(dataframe), dataframe["track_id"].to_numpy(), **kwargs)
+
+    def save(self, index_dir=INDEX_DIR):
+        os.makedirs(index_dir, exist_ok=True)
+
+        for name in ARRAYS:
+            np.save(os.path.join(index_dir, f"{name}.npy"), getattr(self, name))
+
+        metadata = {"created_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "columns": EMBEDDING_COLUMNS,
+                    "n_tracks": len(self),
+                    "n_lists": self.n_lists,
+                    "nprobe": self.nprobe,
+                    "offset": self.offset.tolist(),
+                    "scale": self.scale.tolist()}
+
+        with open(os.path.join(index_dir, "index.json"), "w") as f:
+            json.dump(metadata, f, indent=4)
+
+    @classmethod
+    def load(cls, index_dir=INDEX_DIR, nprobe=None):
+        with open(os.path.join(index_dir, "index.json")) as f:
+            metadata = json.load(f)
+
+        # Memory-mapped: pages are read on demand and shared between processes
+        arrays = {name: np.load(os.path.join(index_dir, f"{name}.npy"), mmap_mode="r") for name in ARRAYS}
+
+        return cls(offset=metadata["offset"], scale=metadata["scale"],
+                   nprobe=nprobe or metadata["nprobe"], **arrays)
+
+    def query(self, profile, k=10, nprobe=None):
+        query = scale_query(profile, self.offset, self.scale)
+        nprobe = min(nprobe or self.nprobe, self.n_lists)
+
+        centroid_dist = ((self.centroids - query) ** 2).sum(axis=1)
+        lists = np.argpartition(centroid_dist, nprobe - 1)[:nprobe] if nprobe < self.n_lists else np.arange(self.n_lists)
+
+        candidates, dists = [], []
+        for cell in lists:
+            start, end = self.list_offsets[cell], self.list_offsets[cell + 1]
+            diff = self.vectors[start:end] - query
+            dists.append(np.einsum("ij,ij->i", diff, diff))
+            candidates.append(np.arange(start, end))
+
+        dist = np.concatenate(dists)
+        candidates = np.concatenate(candidates)
+
+        if len(dist) > k:
+            top = np.argpartition(dist, k - 1)[:k]
+            dist, candidates = dist[top], candidates[top]
+
+        order = np.argsort(dist, kind="stable")
+        return self.track_ids[candidates[order]], np.sqrt(dist[order])
+
+    def nearest(self, profile, k=10, nprobe=None):
+        return self.query(profile, k, nprobe)[0].tolist()
+
+    def sample(self, profile, n=3, pool_size=30):
+        pool = self.nearest(profile, pool_size)
+        return random.sample(pool, min(n, len(pool)))
+
+    def __len__(self):
+        return len(self.vectors)
+
+
+###########
+# RECALL
+###########
+
+def query_profiles(index, n_queries, noise=0.05, seed=0):
+    # Catalogue points with a little noise, in original units, like real user profiles
+    rng = np.random.default_rng(seed)
+    rows = np.sort(rng.choice(len(index), n_queries, replace=False))
+    scaled = np.asarray(index.vectors[rows]) + rng.normal(0, noise, (n_queries, index.vectors.shape[1]))
+    return scaled.astype(np.float32) * index.scale + index.offset
+
+
+def recall_at_k(index, exact_index, profiles, k=30, nprobes=(1, 2, 4, 8, 16, 32)):
+    truth = [set(exact_index.nearest(profile, k)) for profile in profiles]
+    results = []
+
+    for nprobe in nprobes:
+        hits, latencies = 0, []
+        for profile, expected in zip(profiles, truth):
+            start = time.perf_counter()
+            found = index.nearest(profile, k, nprobe)
+            latencies.append(time.perf_counter() - start)
+            hits += len(expected.intersection(found))
+
+        results.append({"nprobe": nprobe,
+                        "recall": hits / (k * len(profiles)),
+                        "p50_ms": float(np.percentile(latencies, 50) * 1000),
+                        "p99_ms": float(np.percentile(latencies, 99) * 1000)})
+
+    return pd.DataFrame(results)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the IVF nearest track index")
+    parser.add_argument("--input", default="./datasets/spotify_clustered.csv",
+                        help="CSV with track_id and the audio features, e.g. ./datasets/spotify_data.csv")
+    parser.add_argument("--output", default=INDEX_DIR)
+    parser.add_argument("--lists", type=int, default=None, help="inverted lists, default sqrt(tracks)")
+    parser.add_argument("--nprobe", type=int, default=8, help="lists scanned per query by default")
+    parser.add_argument("--k", type=int, default=30)
+    parser.add_argument("--queries", type=int, default=200, help="queries for the recall report, 0 to skip")
+    args = parser.parse_args()
+
+    df_tracks = pd.read_csv(args.input, usecols=["track_id"] + AUDIO_FEATURE_COLUMNS, dtype={"track_id": str}).dropna()
+
+    start = time.perf_counter()
+    index = IVFIndex.from_tracks(df_tracks, n_lists=args.lists, nprobe=args.nprobe)
+    index.save(args.output)
+    print(f"Indexed {len(index)} tracks in {index.n_lists} lists in {time.perf_counter() - start:.2f} s -> {args.output}")
+
+    if args.queries:
+        exact_index = NearestTrackIndex.from_tracks(df_tracks, method="brute")
+        print(f"recall@{args.k} against exact search:")
+        print(recall_at_k(index, exact_index, query_profiles(index, args.queries), args.k).to_string(index=False))
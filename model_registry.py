@@ -0,0 +1,122 @@
+import os
+import sys
+import time
+import hashlib
+import threading
+
+import joblib
+import psutil
+
+
+###########
+# MODEL REGISTRY
+###########
+
+# One registry per process: Streamlit re-executes streamlit.py on every rerun
+# but imported modules stay alive, so every session shares these entries.
+
+class ModelRegistry:
+    def __init__(self, model_dir="./models"):
+        self.model_dir = model_dir
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def path_for(self, name):
+        file_name = name if name.endswith(".pkl") else f"{name}.pkl"
+        return os.path.join(self.model_dir, file_name)
+
+    def get(self, name):
+        path = self.path_for(name)
+        stat = os.stat(path)
+
+        entry = self._entries.get(name)
+        if entry is not None and entry["mtime_ns"] == stat.st_mtime_ns and entry["file_size"] == stat.st_size:
+            return entry["model"]
+
+        with self._lock:
+            entry = self._entries.get(name)
+            stat = os.stat(path)
+
+            if entry is not None:
+                if entry["mtime_ns"] == stat.st_mtime_ns and entry["file_size"] == stat.st_size:
+                    return entry["model"]
+
+                # Touched but identical content (e.g. re-copied artifact): keep the loaded object
+                if file_hash(path) == entry["sha256"]:
+                    entry["mtime_ns"] = stat.st_mtime_ns
+                    return entry["model"]
+
+            entry = self._load(name, path, stat)
+            self._entries[name] = entry
+
+        return entry["model"]
+
+    def _load(self, name, path, stat):
+        process = psutil.Process()
+
+        # Process-wide: the first load of an estimator also imports its modules (counted in
+        # imported_modules), and native allocations make it coarse, so it is not the object size
+        modules_before = len(sys.modules)
+        rss_before = process.memory_info().rss
+        start = time.perf_counter()
+        model = joblib.load(path)
+        load_time = time.perf_counter() - start
+        rss_after = process.memory_info().rss
+
+        previous = self._entries.get(name)
+
+        entry = {"model": model,
+                 "path": path,
+                 "mtime_ns": stat.st_mtime_ns,
+                 "file_size": stat.st_size,
+                 "sha256": file_hash(path),
+                 "load_time": load_time,
+                 "process_rss_delta": max(rss_after - rss_before, 0),
+                 "imported_modules": len(sys.modules) - modules_before,
+                 "loads": previous["loads"] + 1 if previous else 1}
+
+        print(f"Loaded {name} in {load_time * 1000:.1f} ms (file {stat.st_size / 1024**2:.2f} MB, "
+              f"process RSS +{entry['process_rss_delta'] / 1024**2:.2f} MB, "
+              f"{entry['imported_modules']} modules imported)")
+
+        return entry
+
+    def versions(self, names):
+        # Artifact hashes of the current files, (re)loading any that changed
+        for name in names:
+            self.get(name)
+        return {name: self._entries[name]["sha256"] for name in names}
+
+    def report(self):
+        return [{"name": name,
+                 "path": entry["path"],
+                 "load_time_ms": round(entry["load_time"] * 1000, 2),
+                 "file_size_mb": round(entry["file_size"] / 1024**2, 3),
+                 "process_rss_delta_mb": round(entry["process_rss_delta"] / 1024**2, 3),
+                 "imported_modules": entry["imported_modules"],
+                 "loads": entry["loads"],
+                 "sha256": entry["sha256"][:12]}
+                for name, entry in self._entries.items()]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+registry = ModelRegistry()
+
+
+def load_model(name):
+    return registry.get(name)
+
+
+def model_versions(names):
+    return registry.versions(names)
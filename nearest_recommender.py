@@ -0,0 +1,102 @@
+import random
+
+import numpy as np
+from sklearn.neighbors import KDTree
+
+from spotify_features import EMBEDDING_COLUMNS, embed_tracks
+
+
+BLOCK_SIZE = 1 << 16
+
+
+###########
+# NEAREST TRACK INDEX
+###########
+
+# Tracks live in the spotify_model space (mental health indices, tempo, valence and
+# energy quintiles), the same space predict_profile feeds to the cluster model.
+# Each dimension is rescaled by its catalogue range so tempo does not drown out
+# the 0-1 indices.
+
+def profile_vector(profile):
+    return np.array([profile[col] for col in EMBEDDING_COLUMNS], dtype=np.float32)
+
+
+def feature_range(vectors):
+    offset = vectors.min(axis=0)
+    value_range = vectors.max(axis=0) - offset
+    return offset, np.where(value_range > 0, value_range, 1).astype(np.float32)
+
+
+def scale_query(profile, offset, scale):
+    vector = profile_vector(profile) if isinstance(profile, dict) else np.asarray(profile, dtype=np.float32)
+    return (vector - offset) / scale
+
+
+class NearestTrackIndex:
+    methods = ["kdtree", "brute"]
+
+    def __init__(self, vectors, track_ids, method="kdtree", leaf_size=40, block_size=BLOCK_SIZE):
+        if method not in self.methods:
+            raise ValueError(f"Unknown method {method}, expected one of {self.methods}")
+
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.offset, self.scale = feature_range(vectors)
+
+        self.vectors = np.ascontiguousarray((vectors - self.offset) / self.scale)
+        self.track_ids = np.asarray(track_ids, dtype=object)
+        self.method = method
+        self.block_size = block_size
+        self.norms = np.einsum("ij,ij->i", self.vectors, self.vectors)
+        self.tree = KDTree(self.vectors, leaf_size=leaf_size) if method == "kdtree" else None
+
+    @classmethod
+    def from_tracks(cls, dataframe, **kwargs):
+        return cls(embed_tracks(dataframe), dataframe["track_id"].to_numpy(), **kwargs)
+
+    def _scale_query(self, profile):
+        return scale_query(profile, self.offset, self.scale)
+
+    def _brute_query(self, query, k):
+        # ||x - q||^2 ranks like ||x||^2 - 2 x.q, a single matrix-vector product
+        # per block. Blocks keep the temporaries cache sized; each keeps 2k
+        # candidates, which are re-ranked on exact distances at the end.
+        n_candidates = 2 * k
+        candidates = []
+
+        for start in range(0, len(self.vectors), self.block_size):
+            scores = self.norms[start:start + self.block_size] - 2 * (self.vectors[start:start + self.block_size] @ query)
+            if len(scores) > n_candidates:
+                top = np.argpartition(scores, n_candidates - 1)[:n_candidates]
+            else:
+                top = np.arange(len(scores))
+            candidates.append(top + start)
+
+        candidates = np.concatenate(candidates)
+        diff = self.vectors[candidates] - query
+        dist = np.einsum("ij,ij->i", diff, diff)
+        order = np.argsort(dist, kind="stable")[:k]
+
+        return np.sqrt(dist[order]), candidates[order]
+
+    def query(self, profile, k=10):
+        query = self._scale_query(profile)
+        k = min(k, len(self.vectors))
+
+        if self.tree is not None:
+            dist, ind = self.tree.query(query.reshape(1, -1), k=k)
+            dist, ind = dist[0], ind[0]
+        else:
+            dist, ind = self._brute_query(query, k)
+
+        return self.track_ids[ind], dist
+
+    def nearest(self, profile, k=10):
+        return self.query(profile, k)[0].tolist()
+
+    def sample(self, profile, n=3, pool_size=30):
+        pool = self.nearest(profile, pool_size)
+        return random.sample(pool, min(n, len(pool)))
+
+    def __len__(self):
+        return len(self.vectors)
@@ -0,0 +1,11 @@
+import multiprocessing
+
+
+###########
+# PROCESS POOLS
+###########
+
+def process_pool_context():
+    # fork where available: the numbered scripts and preprocess_model_*.py train at import
+    # time with no __main__ guard, so spawned workers would rerun them
+    return multiprocessing.get_context("fork" if "fork" in multiprocessing.get_all_start_methods() else None)
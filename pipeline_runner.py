@@ -0,0 +1,282 @@
+import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import argparse
+import subprocess
+from collections import ChainMap
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+STATE_PATH = "./cache/pipeline_state.json"
+LOG_DIR = "./cache/pipeline_logs"
+
+# The offline workflow: every numbered script with the files it reads and writes.
+# Dependencies follow from the paths (a stage runs after the stages producing its inputs),
+# so the survey and Spotify branches are independent and run side by side.
+STAGES = {"eda_spotify": {"script": "02_eda_spotify.py",
+                          "inputs": ["./datasets/spotify_data.csv", "./genre_taxonomy.json"],
+                          "outputs": ["./datasets/spotify_final.csv", "./models/spotify_winsorizer.pkl"]},
+          "spotify_clustering": {"script": "04_spotify_clustering.py",
+                                 "inputs": ["./datasets/spotify_final.csv"],
+                                 "outputs": ["./datasets/spotify_clustered.csv", "./models/clustering_bundle.pkl",
+                                             "./segment_datasets"]},
+          "spotify_model_format": {"script": "05_spotify_model_format.py",
+                                   "inputs": ["./datasets/spotify_clustered.csv"],
+                                   "outputs": ["./datasets/spotify_model.csv",
+                                               "./models/spotify_quintile_binner.pkl"]},
+          "spotify_models": {"script": "preprocess_model_spotify.py",
+                             "inputs": ["./datasets/spotify_model.csv"],
+                             "outputs": ["./models/spotify_preprocessing.pkl", "./models/spotify_preprocessing.json",
+                                         "./models/spotify_model.pkl"]},
+          "eda_survey": {"script": "03_eda_survey.py",
+                         "inputs": ["./datasets/mental_survey_results.csv", "./genre_taxonomy.json"],
+                         "outputs": ["./datasets/mental_final.csv", "./models/survey_winsorizer.pkl"]},
+          "survey_models": {"script": "preprocess_model_survey.py",
+                            "inputs": ["./datasets/mental_final.csv"],
+                            "outputs": ["./models/survey_preprocessing.pkl", "./models/survey_preprocessing.json",
+                                        "./models/tempo_model.pkl", "./models/anx_model.pkl",
+                                        "./models/dep_model.pkl", "./models/ins_model.pkl",
+                                        "./models/survey_models.json"]}}
+
+
+###########
+# CONTENT HASHES
+###########
+
+# Stdlib only (no model_registry.file_hash): a child's peak RSS starts from the
+# runner's at fork, so the runner stays small. Hashes are memoized by size and
+# mtime, so unchanged multi-GB inputs are not re-read on every run.
+
+def file_hash(path, memo=None, chunk_size=1024 * 1024):
+    stat = os.stat(path)
+    signature = [stat.st_size, stat.st_mtime_ns]
+    if memo is not None and memo.get(path, {}).get("signature") == signature:
+        return memo[path]["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+
+    if memo is not None:
+        memo[path] = {"signature": signature, "sha256": digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def path_hash(path, memo=None):
+    # A directory hashes as its sorted file names and contents; a missing path as None
+    if os.path.isdir(path):
+        digest = hashlib.sha256()
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                digest.update(file_hash(file_path, memo).encode())
+        return digest.hexdigest()
+
+    return file_hash(path, memo) if os.path.exists(path) else None
+
+
+def local_modules(script, root="."):
+    # The script and every repository module it imports, transitively
+    seen, queue = [], [script]
+    while queue:
+        path = queue.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+
+        with open(path) as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+                names = [node.module]
+            else:
+                continue
+            for name in names:
+                module_path = os.path.join(root, name.split(".")[0] + ".py")
+                if os.path.exists(module_path):
+                    queue.append(module_path)
+
+    return sorted(seen)
+
+
+def stage_key(stage, memo=None):
+    code = {path: file_hash(path, memo) for path in local_modules(stage["script"])}
+    inputs = {path: path_hash(path, memo) for path in stage["inputs"]}
+    return hashlib.sha256(json.dumps({"code": code, "inputs": inputs}, sort_keys=True).encode()).hexdigest()
+
+
+###########
+# DAG
+###########
+
+def stage_dependencies(stages):
+    producers = {path: name for name, stage in stages.items() for path in stage["outputs"]}
+    return {name: sorted({producers[path] for path in stage["inputs"] if path in producers} - {name})
+            for name, stage in stages.items()}
+
+
+def with_upstream(names, dependencies):
+    selected, queue = set(), list(names)
+    while queue:
+        name = queue.pop()
+        if name not in selected:
+            selected.add(name)
+            queue.extend(dependencies[name])
+    return selected
+
+
+###########
+# STATE
+###########
+
+def read_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {"stages": {}, "hashes": {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_state(state, path=STATE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def is_up_to_date(stage, key, record, memo=None):
+    # Same code and inputs as the last successful run, and the outputs it left are untouched
+    if record is None or record.get("key") != key:
+        return False
+    return all(path_hash(path, memo) == record["outputs"].get(path) for path in stage["outputs"])
+
+
+###########
+# RUN
+###########
+
+def run_script(name, stage, log_dir=LOG_DIR):
+    os.makedirs(log_dir, exist_ok=True)
+    log_path = os.path.join(log_dir, f"{name}.log")
+
+    start = time.perf_counter()
+    with open(log_path, "w") as log:
+        process = subprocess.Popen([sys.executable, stage["script"]], stdout=log, stderr=subprocess.STDOUT)
+        # wait4 reaps the child and returns its rusage: ru_maxrss is the stage's peak RSS in KB
+        _, status, usage = os.wait4(process.pid, 0)
+    process.returncode = os.waitstatus_to_exitcode(status)
+
+    return {"returncode": process.returncode,
+            "wall_s": time.perf_counter() - start,
+            "peak_rss_mb": usage.ru_maxrss / 1024,
+            "log": log_path}
+
+
+def execute_stage(name, stage, record, memo, force=False, dry_run=False, log_dir=LOG_DIR):
+    missing = [path for path in stage["inputs"] if not os.path.exists(path)]
+    if missing:
+        return {"status": "failed", "error": f"missing inputs: {missing}"}
+
+    key = stage_key(stage, memo)
+    if not force and is_up_to_date(stage, key, record, memo):
+        return {"status": "skipped"}
+    if dry_run:
+        return {"status": "would run"}
+
+    result = run_script(name, stage, log_dir)
+    if result["returncode"] != 0:
+        return {"status": "failed", "error": f"exit code {result['returncode']}, see {result['log']}", **result}
+
+    outputs = {path: path_hash(path, memo) for path in stage["outputs"]}
+    return {"status": "ran", "key": key, "outputs": outputs, **result}
+
+
+def run_stages(names=None, stages=STAGES, workers=2, force=False, dry_run=False, state_path=STATE_PATH,
+               log_dir=LOG_DIR):
+    start = time.perf_counter()
+    dependencies = stage_dependencies(stages)
+    pending = with_upstream(names or list(stages), dependencies)
+
+    state = read_state(state_path)
+    memo = state["hashes"]
+    results, running, stage_memos = {}, {}, {}
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for name in sorted(pending):
+                if any(dep in pending or dep in running.values() for dep in dependencies[name]):
+                    continue
+                pending.remove(name)
+
+                failed = [dep for dep in dependencies[name] if results.get(dep, {}).get("status") == "failed"]
+                if failed:
+                    results[name] = {"status": "failed", "error": f"upstream failed: {failed}"}
+                    print(f"{name}: not run, upstream failed ({', '.join(failed)})")
+                    continue
+
+                if dry_run and any(results[dep]["status"] == "would run" for dep in dependencies[name]):
+                    results[name] = {"status": "would run"}
+                    print(f"{name}: would run (upstream changes)")
+                    continue
+
+                # A rebuilt upstream stage changes this stage's input hashes, so no explicit invalidation.
+                # Stages read the shared memo but write new hashes to their own layer, merged back here
+                # once they finish, so worker threads never mutate the dict write_state is dumping
+                stage_memos[name] = ChainMap({}, memo)
+                running[executor.submit(execute_stage, name, stages[name], state["stages"].get(name),
+                                        stage_memos[name], force, dry_run, log_dir)] = name
+
+            if not running:
+                continue
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                memo.update(stage_memos.pop(name).maps[0])
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"status": "failed", "error": f"{type(e).__name__}: {e}"}
+                results[name] = result
+
+                if result["status"] == "ran":
+                    print(f"{name}: ran in {result['wall_s']:.1f} s, peak RSS {result['peak_rss_mb']:.0f} MB")
+                    state["stages"][name] = {"key": result["key"], "outputs": result["outputs"],
+                                             "wall_s": result["wall_s"], "peak_rss_mb": result["peak_rss_mb"],
+                                             "finished_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+                elif result["status"] == "failed":
+                    print(f"{name}: failed, {result['error']}")
+                else:
+                    print(f"{name}: {result['status']}")
+
+            if not dry_run:
+                write_state(state, state_path)
+
+    print(f"Pipeline finished in {time.perf_counter() - start:.1f} s")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the numbered scripts as a DAG, skipping stages whose "
+                                                 "code and inputs are unchanged")
+    parser.add_argument("stages", nargs="*",
+                        help=f"stages to bring up to date, with their upstream stages (default: all): {', '.join(STAGES)}")
+    parser.add_argument("--workers", type=int, default=2, help="stages run at once (survey and Spotify branches)")
+    parser.add_argument("--force", action="store_true", help="rerun even when nothing changed")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages would run")
+    args = parser.parse_args()
+
+    unknown = [name for name in args.stages if name not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {unknown}")
+
+    results = run_stages(args.stages, workers=args.workers, force=args.force, dry_run=args.dry_run)
+    sys.exit(1 if any(result["status"] == "failed" for result in results.values()) else 0)
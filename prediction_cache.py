@@ -0,0 +1,84 @@
+import json
+import time
+import hashlib
+import threading
+from numbers import Number
+from collections import OrderedDict
+
+
+###########
+# PREDICTION CACHE
+###########
+
+# Quiz answers live in a small discrete space (integer ages, 0.25 hour steps,
+# fixed choices), so identical answer sets are common and their predictions
+# can be shared across sessions.
+
+def answer_key(answers, version=None):
+    canonical = {key: round(float(value), 6) if isinstance(value, Number) and not isinstance(value, bool) else value
+                 for key, value in answers.items()}
+    payload = json.dumps({"answers": canonical, "version": version}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PredictionCache:
+    def __init__(self, max_size=4096, ttl=None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+
+            if item is not None and self.ttl is not None and time.monotonic() - item[0] > self.ttl:
+                del self._items[key]
+                item = None
+
+            if item is None:
+                self.misses += 1
+                return None
+
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = (time.monotonic(), value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def get_or_compute(self, answers, compute, version=None):
+        # version identifies the models behind compute, so retrained artifacts miss the old entries
+        key = answer_key(answers, version)
+
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+
+        return value
+
+    @property
+    def hit_ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {"size": len(self._items),
+                "max_size": self.max_size,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hit_ratio}
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.hits = 0
+            self.misses = 0
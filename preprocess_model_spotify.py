@@ -7,6 +7,8 @@ from lightgbm import LGBMClassifier
 from sklearn.pipeline import Pipeline
 from sklearn.compose import ColumnTransformer
 
+from preprocessing import SPOTIFY_INPUT_COLUMNS, preprocess_spotify_df, export_preprocessing
+
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -35,28 +37,15 @@ preprocessor = ColumnTransformer(
 
 preprocessing_pipeline = Pipeline([("preprocessor", preprocessor)])
 
-###########
-joblib.dump(preprocessing_pipeline, "./models/spotify_preprocessing.pkl")
-###########
-
-def preprocess_df(new_data, pipeline):
-    
-    preprocessed_data = pipeline.named_steps["preprocessor"].transform(new_data)
-    
-    feature_names = (
-        pipeline.named_steps["preprocessor"].named_transformers_["pass_cols"].get_feature_names_out().tolist() +
-        pipeline.named_steps["preprocessor"].named_transformers_["sc_cols"].get_feature_names_out().tolist()
-    )
-
-    preprocessed_df = pd.DataFrame(preprocessed_data, columns=feature_names)
-    
-    return preprocessed_df
-
 new_user = df_spoti_model.sample(1)
 
 preprocessing_pipeline.fit(df_spoti_model)
 
-preprocessed_data_X = preprocess_df(df_spoti_model, preprocessing_pipeline)
+###########
+export_preprocessing(preprocessing_pipeline, df_spoti_model, "spotify_preprocessing", SPOTIFY_INPUT_COLUMNS)
+###########
+
+preprocessed_data_X = preprocess_spotify_df(df_spoti_model, preprocessing_pipeline)
 
 
 ###########
@@ -0,0 +1,407 @@
+import os
+import json
+import hashlib
+from datetime import datetime, timezone
+
+import joblib
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.base import BaseEstimator, TransformerMixin, clone
+from sklearn.exceptions import NotFittedError
+from sklearn.utils.validation import check_is_fitted
+
+from model_registry import load_model, file_hash
+
+
+SURVEY_INPUT_COLUMNS = ["age", "streaming_service", "hours_per_day", "while_working", "instrumentalist",
+                        "fav_genre", "exploratory", "frequency_instrumental", "frequency_traditional",
+                        "frequency_dance", "frequency_jazz", "frequency_metal", "frequency_pop",
+                        "frequency_rnb", "frequency_rap", "frequency_rock", "music_effects"]
+
+SPOTIFY_INPUT_COLUMNS = ["anxiety_index", "depression_index", "insomnia_index", "tempo", "valence", "energy"]
+
+# Lower bounds of age groups 1..5, ages below 11 fall into group 0
+AGE_GROUP_BINS = [11, 27, 43, 59, 77]
+
+FREQUENCY_LEVELS = ["Never", "Rarely", "Sometimes", "Often"]
+
+
+###########
+# FEATURE ENGINEERING
+###########
+
+class FeatureEngineer(BaseEstimator, TransformerMixin):
+    def fit(self, X, y=None):
+        # Range of hours_per_day learned once so a row is normalized the same way alone or in a batch
+        hours = X["hours_per_day"].astype(float)
+        self.hours_min_ = float(hours.min())
+        self.hours_max_ = float(hours.max())
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self, ["hours_min_", "hours_max_"])
+
+        X_ = X.copy()
+
+        # Feature 1
+        age = X_["age"].to_numpy(dtype=float)
+        X_["age_group"] = np.where(np.isnan(age), 0, np.digitize(age, AGE_GROUP_BINS)).astype(int)
+
+        # Feature 2
+        freq_cols = [col for col in X_.columns if "frequency" in col]
+
+        # One categorical lookup over all frequency columns; unknown answers become NaN like Series.map
+        codes = pd.Categorical(X_[freq_cols].to_numpy().ravel(), categories=FREQUENCY_LEVELS).codes
+        codes = codes.reshape(len(X_), len(freq_cols)).astype(np.int64)
+        freq = pd.DataFrame(codes, index=X_.index, columns=freq_cols)
+        for col in freq.columns[(codes < 0).any(axis=0)]:
+            freq[col] = freq[col].where(freq[col] >= 0)
+        X_[freq_cols] = freq
+
+        X_["average_frequency"] = freq.mean(axis=1)
+
+        # Feature 3
+        X_["genre_diversity"] = (freq > 0).mean(axis=1)
+
+        # Feature 4
+        hours_range = self.hours_max_ - self.hours_min_
+        X_["normalized_hours"] = (X_["hours_per_day"] - self.hours_min_) / (hours_range if hours_range else 1.0)
+        X_["normalized_diversity"] = X_["genre_diversity"]
+        X_["normalized_frequency"] = X_["average_frequency"] / 3
+
+        X_["music_consumption_profile"] = (X_["normalized_hours"] * 0.3 +
+                                                  X_["normalized_diversity"] * 0.3 +
+                                                  X_["normalized_frequency"] * 0.4)
+
+        drop = ["normalized_hours", "normalized_diversity", "normalized_frequency"]
+        X_.drop(columns=drop, axis=1, inplace=True)
+
+        # Feature 5
+        X_["rock_metal_affinity"] = (X_["frequency_metal"] + X_["frequency_rock"] + 1) / 2
+
+        # Feature 6
+        X_["mainstream_music_score"] = X_["average_frequency"] * (1 - X_["genre_diversity"])
+
+        # Drop original columns that are no longer needed
+        X_ = X_.drop(columns="average_frequency")
+
+        return X_
+
+
+###########
+# RESERVOIR SAMPLING
+###########
+
+# Reservoir sampling (Algorithm R): row t replaces a random slot with probability size / (t + 1).
+# Lets the quantile-based transformers fit chunk by chunk in bounded memory.
+
+def update_reservoir(reservoir, values, n_seen, size, rng):
+    free = size - len(reservoir)
+    reservoir = np.vstack([reservoir, values[:free]])
+    rest = values[free:] if free > 0 else values
+    if len(rest):
+        seen = n_seen + max(free, 0) + np.arange(len(rest))
+        slots = (rng.random(len(rest)) * (seen + 1)).astype(np.int64)
+        keep = slots < size
+        reservoir[slots[keep]] = rest[keep]
+    return reservoir
+
+
+###########
+# QUANTILE BINNING
+###########
+
+# pd.qcut with the edges kept: fit learns them once (exactly like qcut, or
+# approximately from a reservoir sample with partial_fit), and transform puts
+# any batch, even a single row, into the same bins.
+
+class QuantileBinner(BaseEstimator, TransformerMixin):
+    def __init__(self, n_bins=5, labels=None, reservoir_size=100_000, random_state=42):
+        self.n_bins = n_bins
+        self.labels = labels
+        self.reservoir_size = reservoir_size
+        self.random_state = random_state
+
+    def _quantiles(self):
+        return np.linspace(0, 1, self.n_bins + 1)
+
+    def fit(self, X, y=None):
+        X = pd.DataFrame(X)
+        self.columns_ = list(X.columns)
+        self.edges_ = {col: pd.qcut(X[col], self.n_bins, retbins=True)[1] for col in self.columns_}
+        return self
+
+    def partial_fit(self, X, y=None):
+        X = pd.DataFrame(X)
+        values = X.to_numpy(dtype=float)
+
+        if not hasattr(self, "reservoir_"):
+            self.columns_ = list(X.columns)
+            self.reservoir_ = np.empty((0, len(self.columns_)))
+            self.n_seen_ = 0
+            self.min_ = np.full(len(self.columns_), np.inf)
+            self.max_ = np.full(len(self.columns_), -np.inf)
+            self._rng = np.random.default_rng(self.random_state)
+
+        self.min_ = np.fmin(self.min_, np.nanmin(values, axis=0))
+        self.max_ = np.fmax(self.max_, np.nanmax(values, axis=0))
+
+        self.reservoir_ = update_reservoir(self.reservoir_, values, self.n_seen_, self.reservoir_size, self._rng)
+        self.n_seen_ += len(values)
+
+        edges = np.nanquantile(self.reservoir_, self._quantiles(), axis=0)
+        edges[0], edges[-1] = self.min_, self.max_
+        self.edges_ = {col: edges[:, i] for i, col in enumerate(self.columns_)}
+        return self
+
+    def transform(self, X):
+        check_is_fitted(self, "edges_")
+
+        is_series = isinstance(X, pd.Series)
+        X_ = pd.DataFrame(X).copy()
+        labels = np.asarray(self.labels if self.labels is not None else range(self.n_bins))
+
+        for col in [col for col in self.columns_ if col in X_.columns]:
+            values = X_[col].to_numpy(dtype=float)
+            # Right-closed bins like qcut; values outside the fitted range fall into the end bins
+            binned = labels[np.digitize(values, self.edges_[col][1:-1], right=True)]
+            missing = np.isnan(values)
+            X_[col] = np.where(missing, np.nan, binned) if missing.any() else binned
+
+        return X_[X.name] if is_series else X_
+
+
+###########
+# WINSORIZING
+###########
+
+# IQR capping over every numeric column at once: one quantile([q1, q3]) call
+# gives all limits, one clip applies them. Int columns the fitted data pushes
+# past a fractional limit become float, as with the per-column .loc replacement
+# it replaces; that choice is made at fit time (float_columns) and applied to
+# every batch. partial_fit takes the quantiles from a reservoir sample instead,
+# for data read in chunks.
+
+class Winsorizer(BaseEstimator, TransformerMixin):
+    def __init__(self, q1=0.05, q3=0.95, iqr_factor=1.5, columns=None, reservoir_size=100_000, random_state=42):
+        self.q1 = q1
+        self.q3 = q3
+        self.iqr_factor = iqr_factor
+        self.columns = columns
+        self.reservoir_size = reservoir_size
+        self.random_state = random_state
+
+    def _select_columns(self, X):
+        columns = self.columns
+        if columns is None:
+            columns = X.select_dtypes(include=["int64", "float64"]).columns
+        return list(columns)
+
+    def _set_limits(self, quartile1, quartile3):
+        interquantile_range = quartile3 - quartile1
+        self.lower_ = quartile1 - self.iqr_factor * interquantile_range
+        self.upper_ = quartile3 + self.iqr_factor * interquantile_range
+
+    def fit(self, X, y=None):
+        self.columns_ = self._select_columns(X)
+        self.dtypes_ = X[self.columns_].dtypes
+
+        quartiles = X[self.columns_].quantile([self.q1, self.q3])
+        self.min_ = X[self.columns_].min()
+        self.max_ = X[self.columns_].max()
+        self._set_limits(quartiles.iloc[0], quartiles.iloc[1])
+        return self
+
+    def partial_fit(self, X, y=None):
+        if not hasattr(self, "reservoir_"):
+            self.columns_ = self._select_columns(X)
+            self.dtypes_ = X[self.columns_].dtypes
+            self.reservoir_ = np.empty((0, len(self.columns_)))
+            self.n_seen_ = 0
+            self.min_ = pd.Series(np.inf, index=self.columns_)
+            self.max_ = pd.Series(-np.inf, index=self.columns_)
+            self._rng = np.random.default_rng(self.random_state)
+
+        values = X[self.columns_].to_numpy(dtype=float)
+        self.min_ = np.fmin(self.min_, X[self.columns_].min())
+        self.max_ = np.fmax(self.max_, X[self.columns_].max())
+
+        self.reservoir_ = update_reservoir(self.reservoir_, values, self.n_seen_, self.reservoir_size, self._rng)
+        self.n_seen_ += len(values)
+
+        # Same linear interpolation as DataFrame.quantile: exact while the reservoir holds every row
+        quartiles = np.nanquantile(self.reservoir_, [self.q1, self.q3], axis=0)
+        self._set_limits(pd.Series(quartiles[0], index=self.columns_), pd.Series(quartiles[1], index=self.columns_))
+        return self
+
+    def float_columns(self):
+        # Columns transform returns as float: float ones, and int ones the fitted data pushes
+        # past a fractional limit
+        check_is_fitted(self, ["lower_", "upper_"])
+        fractional = (((self.min_ < self.lower_) & (self.lower_ % 1 > 0)) |
+                      ((self.max_ > self.upper_) & (self.upper_ % 1 > 0)))
+        return [col for col in self.columns_ if fractional[col] or self.dtypes_[col].kind == "f"]
+
+    def outlier_counts(self, X):
+        check_is_fitted(self, ["lower_", "upper_"])
+        values = X[self.columns_]
+        return ((values < self.lower_) | (values > self.upper_)).sum()
+
+    def transform(self, X):
+        check_is_fitted(self, ["lower_", "upper_"])
+
+        X_ = X.copy()
+        values = X_[self.columns_]
+
+        # Every fitted column gets the fitted limits and the fit-time dtype, so a batch's schema
+        # does not depend on whether it happens to contain outliers. Int columns that stay int
+        # are clipped to the integers inside the limits.
+        # Clipping the float and int blocks separately avoids pandas' slow mixed-dtype path.
+        as_float = self.float_columns()
+        as_int = [col for col in self.columns_ if col not in as_float]
+
+        if as_float:
+            X_[as_float] = values[as_float].astype(float).clip(lower=self.lower_[as_float],
+                                                               upper=self.upper_[as_float], axis=1)
+        if as_int:
+            X_[as_int] = values[as_int].clip(lower=np.ceil(self.lower_[as_int]),
+                                             upper=np.floor(self.upper_[as_int]), axis=1).astype(self.dtypes_[as_int])
+
+        return X_
+
+    def limits(self):
+        check_is_fitted(self, ["lower_", "upper_"])
+        return pd.DataFrame({"lower": self.lower_, "upper": self.upper_})
+
+
+###########
+# TRANSFORM HELPERS
+###########
+
+def preprocess_survey_df(new_data, pipeline):
+
+    fe_data = pipeline.named_steps["feature_engineer"].transform(new_data)
+
+    preprocessed_data = pipeline.named_steps["preprocessor"].transform(fe_data)
+
+    feature_names = (
+        pipeline.named_steps["preprocessor"].named_transformers_["bin"].get_feature_names_out().tolist() +
+        pipeline.named_steps["preprocessor"].named_transformers_["freq"].get_feature_names_out().tolist() +
+        pipeline.named_steps["preprocessor"].named_transformers_["musiceffect"].get_feature_names_out().tolist() +
+        pipeline.named_steps["preprocessor"].named_transformers_["num"].get_feature_names_out().tolist() +
+        pipeline.named_steps["preprocessor"].named_transformers_["cat"].get_feature_names_out().tolist()
+    )
+
+    preprocessed_df = pd.DataFrame(preprocessed_data, columns=feature_names)
+
+    return preprocessed_df
+
+
+def preprocess_spotify_df(new_data, pipeline):
+
+    preprocessed_data = pipeline.named_steps["preprocessor"].transform(new_data)
+
+    feature_names = (
+        pipeline.named_steps["preprocessor"].named_transformers_["pass_cols"].get_feature_names_out().tolist() +
+        pipeline.named_steps["preprocessor"].named_transformers_["sc_cols"].get_feature_names_out().tolist()
+    )
+
+    preprocessed_df = pd.DataFrame(preprocessed_data, columns=feature_names)
+
+    return preprocessed_df
+
+
+###########
+# FITTED ARTIFACTS
+###########
+
+# Numeric vs string is all the pipelines care about: an int slider value and a
+# float CSV column must produce the same fingerprint.
+def schema_fingerprint(dataframe, columns):
+    schema = [[col, "number" if pd.api.types.is_numeric_dtype(dataframe[col]) else "string"]
+              for col in columns]
+    return hashlib.sha256(json.dumps(schema).encode()).hexdigest()
+
+
+def metadata_path(name, model_dir="./models"):
+    return os.path.join(model_dir, f"{name}.json")
+
+
+def read_metadata(name, model_dir="./models"):
+    path = metadata_path(name, model_dir)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def check_pipeline_fitted(pipeline):
+    for step in pipeline.named_steps.values():
+        check_is_fitted(step)
+
+
+def export_preprocessing(pipeline, dataframe, name, input_columns, model_dir="./models"):
+    check_pipeline_fitted(pipeline)
+
+    artifact_path = os.path.join(model_dir, f"{name}.pkl")
+    joblib.dump(pipeline, artifact_path)
+
+    previous = read_metadata(name, model_dir)
+
+    metadata = {"name": name,
+                "version": previous["version"] + 1 if previous else 1,
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "sklearn_version": sklearn.__version__,
+                "input_columns": list(input_columns),
+                "schema_fingerprint": schema_fingerprint(dataframe, input_columns),
+                "training_rows": len(dataframe),
+                "artifact_sha256": file_hash(artifact_path)}
+
+    with open(metadata_path(name, model_dir), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    print(f"Exported {name} v{metadata['version']} ({metadata['schema_fingerprint'][:12]})")
+
+    return metadata
+
+
+def check_schema(new_data, metadata):
+    columns = metadata["input_columns"]
+
+    missing = [col for col in columns if col not in new_data.columns]
+    if missing:
+        raise ValueError(f"{metadata['name']} v{metadata['version']} is missing input columns: {missing}")
+
+    if schema_fingerprint(new_data, columns) != metadata["schema_fingerprint"]:
+        raise ValueError(f"Input schema does not match {metadata['name']} v{metadata['version']}")
+
+
+_legacy_fits = {}
+
+
+def load_preprocessing(name, fallback_data=None, new_data=None):
+    pipeline = load_model(name)
+
+    try:
+        check_pipeline_fitted(pipeline)
+        metadata = read_metadata(name)
+        if new_data is not None and metadata is not None:
+            check_schema(new_data, metadata)
+        return pipeline
+    except NotFittedError:
+        pass
+
+    # Artifacts exported before fitting was moved to training time: fit a copy
+    # once per process instead of refitting the shared object on every rerun.
+    if fallback_data is None:
+        raise NotFittedError(f"{name} is not fitted; rerun its preprocess_model_*.py export")
+
+    key = (name, id(pipeline))
+    if key not in _legacy_fits:
+        if callable(fallback_data):
+            fallback_data = fallback_data()
+        print(f"{name} is an unfitted legacy artifact, fitting it once on {len(fallback_data)} rows")
+        _legacy_fits[key] = clone(pipeline).fit(fallback_data)
+
+    return _legacy_fits[key]
@@ -0,0 +1,39 @@
+import random
+
+import numpy as np
+
+
+###########
+# RECOMMENDATION INDEX
+###########
+
+# Built once at load time: every (cluster, pc_segment) cell keeps its top_k
+# track_ids by popularity in one contiguous slice of a flat array, so drawing
+# recommendations never touches the catalogue DataFrame.
+
+class RecommendationIndex:
+    def __init__(self, dataframe, top_k=100):
+        ranked = dataframe.sort_values("popularity", ascending=False, kind="stable")
+        top = ranked.groupby(["cluster", "pc_segment"], sort=False, observed=True).head(top_k)
+        top = top.sort_values(["cluster", "pc_segment"], kind="stable")
+
+        keys = top[["cluster", "pc_segment"]].to_numpy(dtype=np.int64)
+        starts = np.r_[0, np.flatnonzero((np.diff(keys, axis=0) != 0).any(axis=1)) + 1]
+        ends = np.r_[starts[1:], len(top)]
+
+        self.top_k = top_k
+        self.track_ids = top["track_id"].to_numpy(dtype=object)
+        self.cells = {(int(keys[start, 0]), int(keys[start, 1])): (int(start), int(end))
+                      for start, end in zip(starts, ends)}
+
+    def pool(self, cluster, segment):
+        start, end = self.cells.get((int(cluster), int(segment)), (0, 0))
+        return self.track_ids[start:end]
+
+    def sample(self, cluster, segment, n=3):
+        start, end = self.cells.get((int(cluster), int(segment)), (0, 0))
+        picks = random.sample(range(start, end), min(n, end - start))
+        return self.track_ids[picks].tolist()
+
+    def __len__(self):
+        return len(self.track_ids)
@@ -0,0 +1,92 @@
+import os
+import glob
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+# pc_segment = pc1 tercile * 10 + pc2 tercile: the 3 x 3 grid of mood segments
+SEGMENTS = (11, 12, 13, 21, 22, 23, 31, 32, 33)
+
+SEGMENT_DIR = "./segment_datasets"
+SEGMENT_PARQUET = "segments.parquet"
+
+SEGMENT_COLUMNS = ["artist_name", "track_name", "track_id"]
+SEGMENT_TOP_N = 100
+
+
+###########
+# TOP-N PER SEGMENT
+###########
+
+# One stable sort by popularity, then head(n) per segment keeps each segment's
+# n most popular tracks in popularity order
+
+def top_tracks_by_segment(dataframe, n=SEGMENT_TOP_N, segments=SEGMENTS, segment_col="pc_segment"):
+    segment = dataframe[segment_col].astype(int)
+    ranked = dataframe[segment.isin(segments)].assign(segment=segment)
+    ranked = ranked.sort_values("popularity", ascending=False, kind="stable")
+    return ranked.groupby("segment", sort=True).head(n)
+
+
+###########
+# EXPORT
+###########
+
+def segment_csv_path(segment, output_dir=SEGMENT_DIR):
+    return os.path.join(output_dir, f"segment_{segment}.csv")
+
+
+def export_segments(dataframe, output_dir=SEGMENT_DIR, n=SEGMENT_TOP_N, segments=SEGMENTS,
+                    layout="csv", workers=None):
+    top = top_tracks_by_segment(dataframe, n, segments)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # read_segments prefers the Parquet dataset, so neither layout may leave the other's
+    # files (or segments that are no longer exported) behind
+    parquet_path = os.path.join(output_dir, SEGMENT_PARQUET)
+    if os.path.exists(parquet_path):
+        shutil.rmtree(parquet_path)
+
+    groups = list(top.groupby("segment", sort=True))
+    current = [segment_csv_path(segment, output_dir) for segment, _ in groups] if layout == "csv" else []
+    for path in glob.glob(segment_csv_path("*", output_dir)):
+        if path not in current:
+            os.remove(path)
+
+    if layout == "parquet":
+        # One dataset partitioned by segment (segment=11/, segment=12/, ...)
+        table = pa.Table.from_pandas(top[SEGMENT_COLUMNS + ["segment"]], preserve_index=False)
+        pq.write_to_dataset(table, parquet_path, partition_cols=["segment"])
+        return parquet_path
+
+    def write(item):
+        segment, group = item
+        path = segment_csv_path(segment, output_dir)
+        group[SEGMENT_COLUMNS].to_csv(path, index=False)
+        return path
+
+    with ThreadPoolExecutor(max_workers=workers or len(groups) or 1) as executor:
+        return list(executor.map(write, groups))
+
+
+###########
+# READ
+###########
+
+def read_segments(segment_dir=SEGMENT_DIR):
+    # Either layout: the partitioned Parquet dataset if present, else the segment CSVs
+    path = os.path.join(segment_dir, SEGMENT_PARQUET)
+
+    if os.path.isdir(path):
+        dataframe = pd.read_parquet(path)
+        return dataframe.assign(segment=dataframe["segment"].astype(int))
+
+    frames = []
+    for path in sorted(glob.glob(segment_csv_path("*", segment_dir))):
+        segment = int(os.path.basename(path).split("_")[1].split(".")[0])
+        frames.append(pd.read_csv(path).assign(segment=segment))
+    return pd.concat(frames, ignore_index=True) if frames else None
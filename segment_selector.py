@@ -0,0 +1,119 @@
+import random
+
+from segment_export import SEGMENTS
+
+
+###########
+# SEGMENT POOLS
+###########
+
+# segment -> array of every track_id in its segment CSV; built once per process
+# and shared by all sessions, which only keep small ints into it
+
+def build_segment_pools(segments_df):
+    return {int(segment): group["track_id"].to_numpy(dtype=object)
+            for segment, group in segments_df.groupby("segment", observed=True)}
+
+
+###########
+# SEGMENT TOURNAMENT
+###########
+
+class SegmentSelector:
+    __slots__ = ("pools", "segments", "pair_key", "pair_songs", "current_segments", "round_number",
+                 "current_pair_index", "winners", "is_complete", "final_winner")
+
+    def __init__(self, pools, segments=None):
+        self.pools = pools
+        self.segments = [segment for segment in (segments or SEGMENTS) if len(pools.get(segment, ()))]
+        random.shuffle(self.segments)
+
+        # Tracks drawn for the pair on screen, kept until the pair changes
+        self.pair_key = None
+        self.pair_songs = ()
+
+        self.current_segments = self.segments.copy()
+        self.round_number = 1
+        self.current_pair_index = 0
+        self.winners = []
+        self.is_complete = False
+        self.final_winner = None
+
+    @staticmethod
+    def create_pairs(list_to_pair):
+        pairs = list(zip(list_to_pair[::2], list_to_pair[1::2]))
+        if len(list_to_pair) % 2 != 0:
+            pairs.append((list_to_pair[-1],))
+        return pairs
+
+    def get_random_song(self, segment):
+        pool = self.pools[segment]
+        return pool[random.randrange(len(pool))]
+
+    def get_pair_songs(self):
+        # Drawn once per pairing: reruns return the same track_ids, so the
+        # Spotify embeds are not re-created on every interaction
+        current_pair = self.get_next_pair()
+        if not current_pair:
+            return ()
+
+        key = (self.round_number, self.current_pair_index)
+        if key != self.pair_key:
+            self.pair_key = key
+            self.pair_songs = tuple(self.get_random_song(segment) for segment in current_pair)
+
+        return self.pair_songs
+
+    def get_next_pair(self):
+        if self.is_complete:
+            return None
+
+        if not self.current_segments:
+            self.start_new_round()
+
+        if self.current_pair_index < len(self.current_segments):
+            if isinstance(self.current_segments[self.current_pair_index], tuple):
+                return self.current_segments[self.current_pair_index]
+            else:
+                return (self.current_segments[self.current_pair_index],)
+        else:
+            return None
+
+    def start_new_round(self):
+        if len(self.winners) == 1:
+            self.final_winner = self.winners[0]
+            self.is_complete = True
+        else:
+            self.current_segments = self.create_pairs(self.winners)
+            self.winners = []
+            self.current_pair_index = 0
+            self.round_number += 1
+
+    def make_choice(self, choice):
+        if self.is_complete:
+            return self.final_winner, self.round_number
+
+        current_pair = self.get_next_pair()
+        if not current_pair:
+            self.start_new_round()
+            return None, self.round_number
+
+        if len(current_pair) == 1:
+            winner = current_pair[0]
+        else:
+            winner = current_pair[0] if choice == 1 else current_pair[1]
+
+        self.winners.append(winner)
+        self.current_pair_index += 1
+
+        if self.current_pair_index >= len(self.current_segments):
+            self.start_new_round()
+
+        if self.is_complete:
+            return self.final_winner, self.round_number
+        else:
+            return None, self.round_number
+
+    def get_total_rounds(self):
+        n = len(self.segments)
+        return (n - 1).bit_length()
@@ -0,0 +1,61 @@
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from preprocessing import QuantileBinner
+
+
+# Audio features the mental health indices are built from
+AUDIO_FEATURE_COLUMNS = ["instrumentalness", "tempo", "valence", "danceability", "acousticness",
+                         "energy", "loudness"]
+
+INDEX_COLUMNS = ["anxiety_index", "depression_index", "insomnia_index"]
+
+# Same columns, same order as the spotify_model inputs and predict_profile's spoti_input
+EMBEDDING_COLUMNS = INDEX_COLUMNS + ["tempo", "valence", "energy"]
+
+# valence/energy become quintiles, highest quintile labelled 1
+QUINTILE_COLUMNS = ["valence", "energy"]
+QUINTILE_LABELS = [5, 4, 3, 2, 1]
+
+
+###########
+# MENTAL HEALTH INDICES
+###########
+
+def add_mental_health_indices(dataframe):
+    dataframe = dataframe.copy()
+
+    dataframe["anxiety_index"] = (dataframe["instrumentalness"] + (1 - (dataframe["tempo"] / 200)) + dataframe["valence"]) / 3
+
+    dataframe["depression_index"] = ((1 - dataframe["valence"]) + (1 - dataframe["danceability"]) + dataframe["acousticness"]) / 3
+
+    dataframe["insomnia_index"] = ((1 - (dataframe["energy"]) + dataframe["acousticness"] + (1 - (dataframe["loudness"] + 60) / 60))) / 3
+
+    return dataframe
+
+
+def fit_quintile_binner(dataframe, columns=QUINTILE_COLUMNS):
+    return QuantileBinner(n_bins=5, labels=QUINTILE_LABELS).fit(dataframe[columns])
+
+
+###########
+# TRACK EMBEDDING
+###########
+
+# The spotify_model.csv representation of each track: MinMax-scaled indices,
+# raw tempo and valence/energy as 1-5 quintile labels. Without a fitted binner
+# and index scaler the quintiles and index ranges come from this dataframe.
+
+def spotify_model_features(dataframe, quintile_binner=None, index_scaler=None):
+    dataframe = add_mental_health_indices(dataframe)
+    index_scaler = index_scaler or MinMaxScaler().fit(dataframe[INDEX_COLUMNS])
+    dataframe[INDEX_COLUMNS] = index_scaler.transform(dataframe[INDEX_COLUMNS])
+
+    quintile_binner = quintile_binner or fit_quintile_binner(dataframe)
+    dataframe[QUINTILE_COLUMNS] = quintile_binner.transform(dataframe[QUINTILE_COLUMNS])
+
+    return dataframe
+
+
+def embed_tracks(dataframe):
+    return np.ascontiguousarray(spotify_model_features(dataframe)[EMBEDDING_COLUMNS].to_numpy(dtype=np.float32))
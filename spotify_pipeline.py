@@ -0,0 +1,230 @@
+import os
+import time
+import argparse
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.decomposition import IncrementalPCA
+from sklearn.preprocessing import MinMaxScaler, StandardScaler
+
+from chunked_io import read_chunks, PredictionWriter
+from clustering import CLUSTER_COLUMNS, PCA_COLUMNS, BATCH_SIZE, BUNDLE_PATH, make_bundle, save_bundle, assign_clusters
+from genre_taxonomy import apply_taxonomy
+from preprocessing import Winsorizer, QuantileBinner
+from segment_export import top_tracks_by_segment, export_segments, SEGMENTS, SEGMENT_DIR, SEGMENT_COLUMNS, \
+    SEGMENT_TOP_N
+from spotify_features import add_mental_health_indices, spotify_model_features, INDEX_COLUMNS, EMBEDDING_COLUMNS, \
+    QUINTILE_COLUMNS, QUINTILE_LABELS
+
+
+# Columns of spotify_data.csv carried through the pipeline, with their dtypes;
+# every chunk is parsed (and written) with the same schema
+SPOTIFY_DTYPES = {"artist_name": "object",
+                  "track_name": "object",
+                  "track_id": "object",
+                  "popularity": "int64",
+                  "year": "int64",
+                  "genre": "object",
+                  "danceability": "float64",
+                  "energy": "float64",
+                  "key": "int64",
+                  "loudness": "float64",
+                  "mode": "int64",
+                  "speechiness": "float64",
+                  "acousticness": "float64",
+                  "instrumentalness": "float64",
+                  "liveness": "float64",
+                  "valence": "float64",
+                  "tempo": "float64",
+                  "duration_ms": "int64",
+                  "time_signature": "int64"}
+
+CHUNK_SIZE = 100_000
+RESERVOIR_SIZE = 100_000
+
+RAW_PATH = "./datasets/spotify_data.csv"
+FINAL_PATH = "./datasets/spotify_final.csv"
+CLUSTERED_PATH = "./datasets/spotify_clustered.csv"
+MODEL_PATH = "./datasets/spotify_model.csv"
+
+
+###########
+# CHUNKED SPOTIFY PIPELINE
+###########
+
+# 02 -> 04 -> 05 over chunks of spotify_data.csv (or Parquet record batches),
+# so memory depends on chunk_size and the reservoir sizes, not on the dump size.
+#   pass 1 (stats):  genre taxonomy, tempo clip, Winsorizer.partial_fit
+#   pass 2 (clean):  cap outliers, write spotify_final; scaler ranges and valence/energy quintiles
+#   pass 3 (fit):    MiniBatchKMeans and IncrementalPCA on spotify_final
+#   pass 4 (bins):   pc1/pc2 terciles
+#   pass 5 (assign): cluster and pc_segment, write spotify_clustered and spotify_model,
+#                    keep the top tracks per segment
+# Quantiles come from reservoir samples and the clusters from MiniBatchKMeans, so
+# the outputs follow the scripts closely but not exactly; for a catalogue that
+# fits in memory the scripts remain the reference.
+
+def clean_chunk(chunk):
+    chunk = apply_taxonomy(chunk, "genre", "spotify", report=False)
+    chunk["tempo"] = chunk["tempo"].clip(lower=40, upper=250)
+    return chunk
+
+
+def stats_pass(raw_path, chunk_size=CHUNK_SIZE, reservoir_size=RESERVOIR_SIZE):
+    winsorizer = Winsorizer(q1=0.05, q3=0.95, reservoir_size=reservoir_size)
+
+    for chunk in read_chunks(raw_path, chunk_size, list(SPOTIFY_DTYPES), SPOTIFY_DTYPES):
+        winsorizer.partial_fit(clean_chunk(chunk))
+
+    for col in winsorizer.columns_:
+        if winsorizer.min_[col] < winsorizer.lower_[col] or winsorizer.max_[col] > winsorizer.upper_[col]:
+            print(f"Outliers found in {col}. Handling outliers...")
+
+    return winsorizer
+
+
+def final_dtypes(winsorizer):
+    # Int columns capped at a fractional limit are float in every chunk, not just the ones with outliers
+    return {**SPOTIFY_DTYPES, **{col: "float64" for col in winsorizer.float_columns()}}
+
+
+def clean_pass(raw_path, final_path, winsorizer, chunk_size=CHUNK_SIZE, reservoir_size=RESERVOIR_SIZE):
+    dtypes = final_dtypes(winsorizer)
+
+    cluster_scaler = MinMaxScaler()
+    pca_scaler = StandardScaler()
+    index_scaler = MinMaxScaler()
+    quintile_binner = QuantileBinner(n_bins=5, labels=QUINTILE_LABELS, reservoir_size=reservoir_size)
+
+    writer = PredictionWriter(final_path)
+    try:
+        for chunk in read_chunks(raw_path, chunk_size, list(SPOTIFY_DTYPES), SPOTIFY_DTYPES):
+            chunk = winsorizer.transform(clean_chunk(chunk)).astype(dtypes)
+            writer.write(chunk)
+
+            cluster_scaler.partial_fit(chunk[CLUSTER_COLUMNS])
+            pca_scaler.partial_fit(chunk[PCA_COLUMNS])
+            index_scaler.partial_fit(add_mental_health_indices(chunk)[INDEX_COLUMNS])
+            quintile_binner.partial_fit(chunk[QUINTILE_COLUMNS])
+    finally:
+        writer.close()
+
+    return cluster_scaler, pca_scaler, index_scaler, quintile_binner
+
+
+def fit_pass(final_path, dtypes, cluster_scaler, pca_scaler, n_clusters=5, chunk_size=CHUNK_SIZE,
+             batch_size=BATCH_SIZE, random_state=42):
+    rng = np.random.default_rng(random_state)
+    columns = CLUSTER_COLUMNS + [col for col in PCA_COLUMNS if col not in CLUSTER_COLUMNS]
+
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, batch_size=batch_size, n_init=3, random_state=random_state)
+    pca = IncrementalPCA(n_components=2)
+
+    for chunk in read_chunks(final_path, chunk_size, columns, dtypes):
+        X = cluster_scaler.transform(chunk[CLUSTER_COLUMNS])[rng.permutation(len(chunk))]
+
+        # Seeded on the first chunk, refined mini-batch by mini-batch, as in clustering.stream_fit
+        if not hasattr(kmeans, "cluster_centers_"):
+            kmeans.fit(X)
+        else:
+            for batch_start in range(0, len(X), batch_size):
+                kmeans.partial_fit(X[batch_start:batch_start + batch_size])
+
+        if len(chunk) >= pca.n_components:
+            pca.partial_fit(pca_scaler.transform(chunk[PCA_COLUMNS]))
+
+    return kmeans, pca
+
+
+def bins_pass(final_path, dtypes, pca_scaler, pca, chunk_size=CHUNK_SIZE, reservoir_size=RESERVOIR_SIZE):
+    pc_binner = QuantileBinner(n_bins=3, labels=[3, 2, 1], reservoir_size=reservoir_size)
+
+    for chunk in read_chunks(final_path, chunk_size, PCA_COLUMNS, dtypes):
+        pcs = pca.transform(pca_scaler.transform(chunk[PCA_COLUMNS]))
+        pc_binner.partial_fit(pd.DataFrame(pcs, columns=["pc1", "pc2"]))
+
+    return pc_binner
+
+
+def assign_pass(final_path, clustered_path, model_path, dtypes, bundle, index_scaler, quintile_binner,
+                chunk_size=CHUNK_SIZE, n=SEGMENT_TOP_N):
+    top = None
+    clustered_writer = PredictionWriter(clustered_path)
+    model_writer = PredictionWriter(model_path)
+
+    try:
+        for chunk in read_chunks(final_path, chunk_size, list(dtypes), dtypes):
+            clustered = assign_clusters(chunk, bundle)
+            clustered_writer.write(clustered)
+
+            model_df = spotify_model_features(clustered, quintile_binner, index_scaler)
+            model_writer.write(model_df[EMBEDDING_COLUMNS + ["cluster"]])
+
+            # Running top-n: earlier rows first, so popularity ties keep file order like the full sort
+            candidates = clustered[SEGMENT_COLUMNS + ["popularity", "pc_segment"]]
+            top = top_tracks_by_segment(candidates if top is None else pd.concat([top, candidates]), n)
+            top = top.drop(columns="segment")
+    finally:
+        clustered_writer.close()
+        model_writer.close()
+
+    return top
+
+
+def run_pipeline(raw_path=RAW_PATH, final_path=FINAL_PATH, clustered_path=CLUSTERED_PATH, model_path=MODEL_PATH,
+                 segment_dir=SEGMENT_DIR, model_dir="./models", n_clusters=5, chunk_size=CHUNK_SIZE,
+                 reservoir_size=RESERVOIR_SIZE, segment_layout="csv"):
+    timings = {}
+
+    def timed(name, func, *args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        timings[name] = time.perf_counter() - start
+        print(f"{name} pass: {timings[name]:.2f} s")
+        return result
+
+    winsorizer = timed("stats", stats_pass, raw_path, chunk_size, reservoir_size)
+    print(f"{winsorizer.n_seen_} tracks after the genre filter")
+    dtypes = final_dtypes(winsorizer)
+
+    cluster_scaler, pca_scaler, index_scaler, quintile_binner = timed(
+        "clean", clean_pass, raw_path, final_path, winsorizer, chunk_size, reservoir_size)
+
+    kmeans, pca = timed("fit", fit_pass, final_path, dtypes, cluster_scaler, pca_scaler, n_clusters, chunk_size)
+    pc_binner = timed("bins", bins_pass, final_path, dtypes, pca_scaler, pca, chunk_size, reservoir_size)
+
+    bundle = make_bundle(CLUSTER_COLUMNS, cluster_scaler, kmeans, PCA_COLUMNS, pca_scaler, pca, pc_binner)
+    top = timed("assign", assign_pass, final_path, clustered_path, model_path, dtypes, bundle, index_scaler,
+                quintile_binner, chunk_size)
+
+    export_segments(top, segment_dir, n=SEGMENT_TOP_N, segments=SEGMENTS, layout=segment_layout)
+
+    # The same artifacts 02, 04 and 05 save
+    os.makedirs(model_dir, exist_ok=True)
+    joblib.dump(winsorizer, os.path.join(model_dir, "spotify_winsorizer.pkl"))
+    joblib.dump(quintile_binner, os.path.join(model_dir, "spotify_quintile_binner.pkl"))
+    save_bundle(bundle, os.path.join(model_dir, os.path.basename(BUNDLE_PATH)))
+
+    print(f"Spotify pipeline finished in {sum(timings.values()):.2f} s")
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunked 02 -> 04 -> 05 Spotify pipeline "
+                                                 "(CSV or Parquet by file extension)")
+    parser.add_argument("--input", default=RAW_PATH)
+    parser.add_argument("--final", default=FINAL_PATH)
+    parser.add_argument("--clustered", default=CLUSTERED_PATH)
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--segment-dir", default=SEGMENT_DIR)
+    parser.add_argument("--segment-layout", choices=["csv", "parquet"], default="csv")
+    parser.add_argument("--model-dir", default="./models")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--reservoir-size", type=int, default=RESERVOIR_SIZE)
+    args = parser.parse_args()
+
+    run_pipeline(args.input, args.final, args.clustered, args.model, args.segment_dir, args.model_dir, args.k,
+                 args.chunk_size, args.reservoir_size, args.segment_layout)
@@ -3,31 +3,75 @@ from st_clickable_images import clickable_images
 import streamlit.components.v1 as components
 from streamlit_option_menu import option_menu
 import pandas as pd
-import random
-import joblib
-from horoscope_webscraping import get_star_ratings
+import os
+from model_registry import load_model, model_versions
+from horoscope_cache import StarRatingCache
 from analysis_graphs import (polar_plot, artist_radar_plot, genres_by_years, genre_popularity, 
                              top_songs, tempo_by_genre, d_stage, mental_health_by_music, genre_usage,
                              age_genre_dist, genre_hour)
-from preprocess_model_survey import FeatureEngineer
+from preprocessing import load_preprocessing, preprocess_survey_df, preprocess_spotify_df
+from prediction_cache import PredictionCache
+from dataset_store import load_table
+from recommendation_index import RecommendationIndex
+from nearest_recommender import NearestTrackIndex
+from ivf_index import IVFIndex, INDEX_DIR
+from spotify_features import AUDIO_FEATURE_COLUMNS
+from segment_selector import SegmentSelector, build_segment_pools
 
 
-@st.cache_data
-def load_data():
-    df_clustered = pd.read_csv("./datasets/spotify_clustered.csv")
-    df_survey = pd.read_csv("./datasets/mental_final.csv")
-    df_spoti = pd.read_csv("./datasets/spotify_model.csv")
-    segment_11 = pd.read_csv("./segment_datasets/segment_11.csv")
-    segment_12 = pd.read_csv("./segment_datasets/segment_12.csv")
-    segment_13 = pd.read_csv("./segment_datasets/segment_13.csv")
-    segment_21 = pd.read_csv("./segment_datasets/segment_21.csv")
-    segment_22 = pd.read_csv("./segment_datasets/segment_22.csv")
-    segment_23 = pd.read_csv("./segment_datasets/segment_23.csv")
-    segment_31 = pd.read_csv("./segment_datasets/segment_31.csv")
-    segment_32 = pd.read_csv("./segment_datasets/segment_32.csv")
-    segment_33 = pd.read_csv("./segment_datasets/segment_33.csv")
+# Shared by all sessions of this process; repeated answer sets skip preprocessing and all five models
+PREDICTION_CACHE_SIZE = 4096
+PREDICTION_CACHE_TTL = 24 * 60 * 60
 
-    return df_clustered, df_survey, df_spoti, segment_11, segment_12, segment_13, segment_21, segment_22, segment_23, segment_31, segment_32, segment_33
+# Every artifact predict_profile loads: their hashes are part of the prediction cache key
+PROFILE_ARTIFACTS = ["survey_preprocessing", "tempo_model", "anx_model", "dep_model", "ins_model",
+                     "spotify_preprocessing", "spotify_model"]
+
+
+QUIZ_SPOTIFY_COLUMNS = ["track_id", "popularity", "cluster", "pc_segment"]
+
+RECOMMENDATION_POOL_SIZE = 100
+
+# "Closest Match" draws from the tracks nearest the predicted profile
+RECOMMENDER_MODES = ["Mood Segment", "Closest Match"]
+NEAREST_POOL_SIZE = 30
+
+# Inverted lists scanned per query when the IVF index is built (python ivf_index.py):
+# higher is closer to exact search, lower is faster
+ANN_NPROBE = 8
+
+ANALYSIS_SPOTIFY_COLUMNS = ["artist_name", "track_name", "genre", "year", "popularity", "tempo",
+                            "energy", "danceability", "acousticness", "valence", "speechiness",
+                            "liveness", "instrumentalness"]
+
+
+# cache_resource keeps one read-only copy per process instead of unpickling a copy on every rerun
+@st.cache_resource
+def load_quiz_data():
+    df_clustered = load_table("spotify_clustered", columns=QUIZ_SPOTIFY_COLUMNS)
+    recommendation_index = RecommendationIndex(df_clustered, top_k=RECOMMENDATION_POOL_SIZE)
+    segment_pools = build_segment_pools(load_table("segments", columns=["segment", "track_id"]))
+
+    return recommendation_index, segment_pools
+
+
+# Built on first use so the segment recommender does not pay for the tree;
+# an IVF index saved on disk is memory-mapped instead
+@st.cache_resource
+def load_nearest_index():
+    if os.path.exists(os.path.join(INDEX_DIR, "index.json")):
+        return IVFIndex.load(INDEX_DIR, nprobe=ANN_NPROBE)
+
+    df_tracks = load_table("spotify_clustered", columns=["track_id"] + AUDIO_FEATURE_COLUMNS)
+    return NearestTrackIndex.from_tracks(df_tracks)
+
+
+@st.cache_resource
+def load_analysis_data():
+    df_clustered = load_table("spotify_clustered", columns=ANALYSIS_SPOTIFY_COLUMNS)
+    df_survey = load_table("mental_final")
+
+    return df_clustered, df_survey
 
 
 def load_css():
@@ -43,82 +87,50 @@ def spotify_player(track_id):
         height=400)
 
 
-class SegmentSelector:
-    def __init__(self, dataset):
-        self.dataset = dataset
-        self.segments = [11, 12, 13, 21, 22, 23, 31, 32, 33]
-        random.shuffle(self.segments)
-        
-        self.current_segments = self.segments.copy()
-        self.round_number = 1
-        self.current_pair_index = 0
-        self.winners = []
-        self.is_complete = False
-        self.final_winner = None
-
-    def create_pairs(self, list_to_pair):
-        pairs = list(zip(list_to_pair[::2], list_to_pair[1::2]))
-        if len(list_to_pair) % 2 != 0:
-            pairs.append((list_to_pair[-1],))
-        return pairs
-
-    def get_random_song(self, segment):
-        songs = [song for song in self.dataset if song["segment"] == segment]
-        return random.choice(songs)
-
-    def get_next_pair(self):
-        if self.is_complete:
-            return None
-
-        if not self.current_segments:
-            self.start_new_round()
-
-        if self.current_pair_index < len(self.current_segments):
-            if isinstance(self.current_segments[self.current_pair_index], tuple):
-                return self.current_segments[self.current_pair_index]
-            else:
-                return (self.current_segments[self.current_pair_index],)
-        else:
-            return None
-
-    def start_new_round(self):
-        if len(self.winners) == 1:
-            self.final_winner = self.winners[0]
-            self.is_complete = True
-        else:
-            self.current_segments = self.create_pairs(self.winners)
-            self.winners = []
-            self.current_pair_index = 0
-            self.round_number += 1
-
-    def make_choice(self, choice):
-        if self.is_complete:
-            return self.final_winner, self.round_number
-
-        current_pair = self.get_next_pair()
-        if not current_pair:
-            self.start_new_round()
-            return None, self.round_number
-
-        if len(current_pair) == 1:
-            winner = current_pair[0]
-        else:
-            winner = current_pair[0] if choice == 1 else current_pair[1]
-
-        self.winners.append(winner)
-        self.current_pair_index += 1
-
-        if self.current_pair_index >= len(self.current_segments):
-            self.start_new_round()
-
-        if self.is_complete:
-            return self.final_winner, self.round_number
-        else:
-            return None, self.round_number
-
-    def get_total_rounds(self):
-        n = len(self.segments)
-        return (n - 1).bit_length()
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache(max_size=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+
+
+@st.cache_resource
+def get_star_rating_cache():
+    cache = StarRatingCache()
+    cache.start_refresher()
+    return cache
+
+
+def predict_profile(mental_input, hustle, vibe):
+    mental_input_df = pd.DataFrame(data=mental_input, index=[0])
+
+    survey_preprocessor = load_preprocessing("survey_preprocessing", fallback_data=lambda: load_table("mental_final"), new_data=mental_input_df)
+
+    preprocessed_input = preprocess_survey_df(mental_input_df, survey_preprocessor)
+
+    predicted_tempo = load_model("tempo_model").predict(preprocessed_input)[0]
+    predicted_anxiety = load_model("anx_model").predict_proba(preprocessed_input)[0][1]
+    predicted_depression = load_model("dep_model").predict_proba(preprocessed_input)[0][1]
+    predicted_insomnia = load_model("ins_model").predict_proba(preprocessed_input)[0][1]
+
+    spoti_input = {"anxiety_index": predicted_anxiety,
+                   "depression_index": predicted_depression,
+                   "insomnia_index": predicted_insomnia,
+                   "tempo": predicted_tempo,
+                   "valence": vibe,
+                   "energy": hustle}
+
+    spoti_input_df = pd.DataFrame(data=spoti_input, index=[0])
+
+    spoti_preprocessor = load_preprocessing("spotify_preprocessing", fallback_data=lambda: load_table("spotify_model"), new_data=spoti_input_df)
+
+    preprocessed_input_spoti = preprocess_spotify_df(spoti_input_df, spoti_preprocessor)
+
+    predicted_cluster = load_model("spotify_model").predict(preprocessed_input_spoti)[0]
+
+    return {"tempo": float(predicted_tempo),
+            "anxiety": float(predicted_anxiety),
+            "depression": float(predicted_depression),
+            "insomnia": float(predicted_insomnia),
+            "cluster": int(predicted_cluster)}
 
 
 questions = [
@@ -270,18 +282,7 @@ def initialize_session_state():
     if "user_answers" not in st.session_state:
         st.session_state.user_answers = []
     if "segment_selector" not in st.session_state:
-        dataset = [
-            {"segment": 11, "track_id": segment_11.sample(1)["track_id"].values[0]},
-            {"segment": 12, "track_id": segment_12.sample(1)["track_id"].values[0]},
-            {"segment": 13, "track_id": segment_13.sample(1)["track_id"].values[0]},
-            {"segment": 21, "track_id": segment_21.sample(1)["track_id"].values[0]},
-            {"segment": 22, "track_id": segment_22.sample(1)["track_id"].values[0]},
-            {"segment": 23, "track_id": segment_23.sample(1)["track_id"].values[0]},
-            {"segment": 31, "track_id": segment_31.sample(1)["track_id"].values[0]},
-            {"segment": 32, "track_id": segment_32.sample(1)["track_id"].values[0]},
-            {"segment": 33, "track_id": segment_33.sample(1)["track_id"].values[0]}
-        ]
-        st.session_state.segment_selector = SegmentSelector(dataset)
+        st.session_state.segment_selector = SegmentSelector(segment_pools)
     if "recommendations" not in st.session_state:
             st.session_state.recommendations = []
     
@@ -377,13 +378,21 @@ def run_quiz():
             if not st.session_state.segment_selector.is_complete:
                 current_pair = st.session_state.segment_selector.get_next_pair()
                 
+                # A segment without an opponent advances before any player is rendered
+                if current_pair and len(current_pair) == 1:
+                    winner, round_number = st.session_state.segment_selector.make_choice(1)
+                    if winner:
+                        st.session_state.user_answers.append({"selected_segment": winner})
+                        st.session_state.question_index += 1
+                        st.session_state.quiz_data = get_question(st.session_state.question_index)
+                    st.rerun()
+
                 if current_pair:
+                    song1, song2 = st.session_state.segment_selector.get_pair_songs()
                     emptycol1, col1, col2, emptycol2= st.columns([1.2,1,1,1])
                     
                     with col1:
-                        segment1 = current_pair[0]
-                        song1 = st.session_state.segment_selector.get_random_song(segment1)
-                        spotify_player(song1["track_id"])
+                        spotify_player(song1)
                         empty1, col_button, empty2= st.columns([0.8,1,1])
 
                         with col_button:
@@ -395,29 +404,18 @@ def run_quiz():
                                     st.session_state.quiz_data = get_question(st.session_state.question_index)
                                 st.rerun()
                     
-                    if len(current_pair) > 1:
-                        with col2:
-                            segment2 = current_pair[1]
-                            song2 = st.session_state.segment_selector.get_random_song(segment2)
-                            spotify_player(song2["track_id"])
-                            empty1, col_button, empty2= st.columns([0.8,1,1])
-
-                            with col_button:
-                                if st.button("Select", key="select_2"):
-                                    winner, round_number = st.session_state.segment_selector.make_choice(2)
-                                    if winner:
-                                        st.session_state.user_answers.append({"selected_segment": winner})
-                                        st.session_state.question_index += 1
-                                        st.session_state.quiz_data = get_question(st.session_state.question_index)
-                                    st.rerun()
-                    
-                    else:
-                        winner, round_number = st.session_state.segment_selector.make_choice(1)
-                        if winner:
-                            st.session_state.user_answers.append({"selected_segment": winner})
-                            st.session_state.question_index += 1
-                            st.session_state.quiz_data = get_question(st.session_state.question_index)
-                        st.rerun()
+                    with col2:
+                        spotify_player(song2)
+                        empty1, col_button, empty2= st.columns([0.8,1,1])
+
+                        with col_button:
+                            if st.button("Select", key="select_2"):
+                                winner, round_number = st.session_state.segment_selector.make_choice(2)
+                                if winner:
+                                    st.session_state.user_answers.append({"selected_segment": winner})
+                                    st.session_state.question_index += 1
+                                    st.session_state.quiz_data = get_question(st.session_state.question_index)
+                                st.rerun()
 
     else:
         answer_dict ={}
@@ -449,9 +447,9 @@ def run_quiz():
         answer_dict["pc_segment"] = answer_dict.pop("selected_segment")
         
         answer_dict["zodiac"] = answer_dict.pop("What's Your Zodiac Sign ?")
-        hustle_star, vibe_star = get_star_ratings(answer_dict.get("zodiac"))
-        answer_dict["hustle"] = int(hustle_star)
-        answer_dict["vibe"] = int(vibe_star)
+        star_ratings = get_star_rating_cache().get(answer_dict.get("zodiac"))
+        answer_dict["hustle"] = int(star_ratings["hustle"])
+        answer_dict["vibe"] = int(star_ratings["vibe"])
         ###
 
         mental_input = {"age": answer_dict["age"],
@@ -472,46 +470,16 @@ def run_quiz():
                         "frequency_rock": answer_dict["frequency_rock"],
                         "music_effects": answer_dict["music_effects"]}
         
-        mental_input_df = pd.DataFrame(data=mental_input, index=[0])
-
-        #####
-        survey_preprocessor = joblib.load("./models/survey_preprocessing.pkl")
-        #####
-
-        def preprocess_df_survey(new_data, pipeline):
-
-            fe_data = pipeline.named_steps["feature_engineer"].transform(new_data)
-            
-            preprocessed_data = pipeline.named_steps["preprocessor"].transform(fe_data)
-            
-            feature_names = (
-                pipeline.named_steps["preprocessor"].named_transformers_["bin"].get_feature_names_out().tolist() +
-                pipeline.named_steps["preprocessor"].named_transformers_["freq"].get_feature_names_out().tolist() +
-                pipeline.named_steps["preprocessor"].named_transformers_["musiceffect"].get_feature_names_out().tolist() +
-                pipeline.named_steps["preprocessor"].named_transformers_["num"].get_feature_names_out().tolist() +
-                pipeline.named_steps["preprocessor"].named_transformers_["cat"].get_feature_names_out().tolist()
-            )
-
-            preprocessed_df = pd.DataFrame(preprocessed_data, columns=feature_names)
-            
-            return preprocessed_df
-
-
-        survey_preprocessor.fit(df_survey)
-
-        preprocessed_input = preprocess_df_survey(mental_input_df, survey_preprocessor)
+        prediction = get_prediction_cache().get_or_compute(
+            {**mental_input, "hustle": answer_dict["hustle"], "vibe": answer_dict["vibe"]},
+            lambda: predict_profile(mental_input, answer_dict["hustle"], answer_dict["vibe"]),
+            version=model_versions(PROFILE_ARTIFACTS))
 
-        # st.dataframe(preprocessed_input)
-
-        tempo_model = joblib.load("./models/tempo_model.pkl")
-        anx_model = joblib.load("./models/anx_model.pkl")
-        dep_model = joblib.load("./models/dep_model.pkl")
-        ins_model = joblib.load("./models/ins_model.pkl")
-
-        predicted_tempo = tempo_model.predict(preprocessed_input)[0]
-        predicted_anxiety = anx_model.predict_proba(preprocessed_input)[0][1]
-        predicted_depression = dep_model.predict_proba(preprocessed_input)[0][1]
-        predicted_insomnia = ins_model.predict_proba(preprocessed_input)[0][1]
+        predicted_tempo = prediction["tempo"]
+        predicted_anxiety = prediction["anxiety"]
+        predicted_depression = prediction["depression"]
+        predicted_insomnia = prediction["insomnia"]
+        predicted_cluster = prediction["cluster"]
 
         st.subheader("Mental Health Predictions")
         st.divider()
@@ -531,61 +499,27 @@ def run_quiz():
             st.metric(label="insomnia", label_visibility="hidden", value=f"{predicted_insomnia:.2%}")
 
 
-        spoti_input = {"anxiety_index": predicted_anxiety,
-                       "depression_index": predicted_depression,
-                       "insomnia_index": predicted_insomnia,
-                       "tempo": predicted_tempo,
-                       "valence": answer_dict["vibe"],
-                       "energy": answer_dict["hustle"]}
-
-        spoti_input_df = pd.DataFrame(data=spoti_input, index=[0])
- 
-        #####
-        spoti_preprocessor = joblib.load("./models/spotify_preprocessing.pkl")
-        #####
-
-        def preprocess_df_spoti(new_data, pipeline):
-    
-            preprocessed_data = pipeline.named_steps["preprocessor"].transform(new_data)
-            
-            feature_names = (
-                pipeline.named_steps["preprocessor"].named_transformers_["pass_cols"].get_feature_names_out().tolist() +
-                pipeline.named_steps["preprocessor"].named_transformers_["sc_cols"].get_feature_names_out().tolist()
-            )
-
-            preprocessed_df = pd.DataFrame(preprocessed_data, columns=feature_names)
-            
-            return preprocessed_df
-
-
-        spoti_preprocessor.fit(df_spoti)
-
-        preprocessed_input_spoti = preprocess_df_spoti(spoti_input_df, spoti_preprocessor)
-
-        # st.dataframe(preprocessed_input_spoti)
+        profile = {"anxiety_index": predicted_anxiety,
+                   "depression_index": predicted_depression,
+                   "insomnia_index": predicted_insomnia,
+                   "tempo": predicted_tempo,
+                   "valence": answer_dict["vibe"],
+                   "energy": answer_dict["hustle"]}
 
-        spoti_model = joblib.load("./models/spotify_model.pkl")    
-
-        predicted_cluster = spoti_model.predict(preprocessed_input_spoti)[0]
-
-        # st.write(predicted_cluster)
-
-        def get_recommendations(n=3, df=df_clustered, spoti_model_predict=predicted_cluster, answer_dict=answer_dict):
-            recom_pool = df[
-                (df["cluster"] == spoti_model_predict) & 
-                (df["pc_segment"] == answer_dict.get("pc_segment"))
-                ].iloc[:100]
-            
-            return recom_pool.sample(n)["track_id"].tolist()
+        def get_recommendations(n=3, spoti_model_predict=predicted_cluster, answer_dict=answer_dict):
+            if st.session_state.get("recommender_mode") == "Closest Match":
+                return load_nearest_index().sample(profile, n, pool_size=NEAREST_POOL_SIZE)
+            return recommendation_index.sample(spoti_model_predict, answer_dict.get("pc_segment"), n)
         
         st.divider()
         
         col1_empty, col2, col3_empty = st.columns([1.15,1,1])
 
         with col2:
+            st.radio("Recommendation Mode", RECOMMENDER_MODES, key="recommender_mode", horizontal=True)
             if st.button("Would You Like Us to Recommend a Song?"):
                 st.session_state.show_recommendation = True
-                st.session_state.recommendations = get_recommendations(n=3, df=df_clustered, spoti_model_predict=predicted_cluster, answer_dict=answer_dict)
+                st.session_state.recommendations = get_recommendations(n=3, spoti_model_predict=predicted_cluster, answer_dict=answer_dict)
 
         if st.session_state.get("show_recommendation", False):
             dummy1, col2, dummy2 = st.columns([0.55,1,0.5])
@@ -611,21 +545,12 @@ def run_quiz():
                     st.session_state.user_answers = []
                     st.session_state.show_recommendation = False
                     st.session_state.recommendations = []
-                    dataset = [{"segment": 11, "track_id": segment_11.sample(1)["track_id"].values[0]},
-                               {"segment": 12, "track_id": segment_12.sample(1)["track_id"].values[0]},
-                               {"segment": 13, "track_id": segment_13.sample(1)["track_id"].values[0]},
-                               {"segment": 21, "track_id": segment_21.sample(1)["track_id"].values[0]},
-                               {"segment": 22, "track_id": segment_22.sample(1)["track_id"].values[0]},
-                               {"segment": 23, "track_id": segment_23.sample(1)["track_id"].values[0]},
-                               {"segment": 31, "track_id": segment_31.sample(1)["track_id"].values[0]},
-                               {"segment": 32, "track_id": segment_32.sample(1)["track_id"].values[0]},
-                               {"segment": 33, "track_id": segment_33.sample(1)["track_id"].values[0]}]
-                    st.session_state.segment_selector = SegmentSelector(dataset)
+                    st.session_state.segment_selector = SegmentSelector(segment_pools)
                     st.rerun()
 
             with col1:
                 if st.button("Get New Recommendations"):
-                    st.session_state.recommendations = get_recommendations(n=3, df=df_clustered, spoti_model_predict=predicted_cluster, answer_dict=answer_dict)
+                    st.session_state.recommendations = get_recommendations(n=3, spoti_model_predict=predicted_cluster, answer_dict=answer_dict)
                     st.rerun()
             
             
@@ -822,7 +747,6 @@ def team_content():
 st.set_page_config(layout="wide", page_title="Therapy Tunes", page_icon="🎶")
 st.markdown('<link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.3/css/all.min.css">', unsafe_allow_html=True)
 load_css()
-df_clustered, df_survey, df_spoti, segment_11, segment_12, segment_13, segment_21, segment_22, segment_23, segment_31, segment_32, segment_33 = load_data()
 col1, col2, col3 = st.columns([0.8,1,0.7])
 
 with col2:
@@ -846,10 +770,12 @@ options = option_menu(None, ["Quiz", "Analysis", "Team"],
 
 
 if options == "Quiz":
+    recommendation_index, segment_pools = load_quiz_data()
     initialize_session_state()
     run_quiz()
 
 elif options == "Analysis":
+    df_clustered, df_survey = load_analysis_data()
     analysis_content()
 
 elif options == "Team":
@@ -0,0 +1,154 @@
+import os
+import json
+import time
+import threading
+from datetime import datetime, timezone
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import psutil
+from threadpoolctl import threadpool_limits
+from sklearn.ensemble import AdaBoostClassifier, RandomForestClassifier
+from sklearn.svm import SVC
+from xgboost import XGBRegressor
+
+from model_registry import file_hash
+from parallel import process_pool_context
+
+
+MANIFEST_NAME = "survey_models.json"
+
+# The four models predict_profile loads. "threaded" models take n_jobs and get
+# the cores left over once every single-threaded model has one.
+SURVEY_MODELS = {
+    # RMSE: 31.80
+    "tempo_model": {"target": "tempo",
+                    "estimator": XGBRegressor,
+                    "params": {"learning_rate": 0.01,
+                               "max_depth": 3,
+                               "n_estimators": 100,
+                               "subsample": 0.8,
+                               "random_state": 42},
+                    "threaded": True},
+
+    # Accuracy: 0.57, F1 Score: 0.58, Recall: 0.61, Precision: 0.55, ROC AUC: 0.59
+    "anx_model": {"target": "anxiety",
+                  "estimator": AdaBoostClassifier,
+                  "params": {"learning_rate": 0.1,
+                             "n_estimators": 100,
+                             "random_state": 42},
+                  "threaded": False},
+
+    # Accuracy: 0.61, F1 Score: 0.56, Recall: 0.53, Precision: 0.60, ROC AUC: 0.65
+    "dep_model": {"target": "depression",
+                  "estimator": SVC,
+                  "params": {"C": 1,
+                             "kernel": "rbf",
+                             "degree": 3,
+                             "coef0": 0.0,
+                             "probability": True,
+                             "random_state": 42},
+                  "threaded": False},
+
+    # Accuracy: 0.58, F1 Score: 0.53, Recall: 0.50, Precision: 0.56, ROC AUC: 0.63
+    "ins_model": {"target": "insomnia",
+                  "estimator": RandomForestClassifier,
+                  "params": {"criterion": "gini",
+                             "max_depth": None,
+                             "n_estimators": 100,
+                             "random_state": 42},
+                  "threaded": True}}
+
+
+###########
+# THREAD BUDGETS
+###########
+
+def thread_budgets(models=SURVEY_MODELS, cpu_count=None):
+    # Single-threaded models (AdaBoost, SVC) get one core each, the threaded ones share
+    # the rest, so the pool never runs more threads than there are cores
+    cpu_count = cpu_count or os.cpu_count()
+    threaded = [name for name, spec in models.items() if spec["threaded"]]
+    spare = cpu_count - (len(models) - len(threaded))
+    per_model = max(1, spare // len(threaded)) if threaded else 1
+    return {name: per_model if spec["threaded"] else 1 for name, spec in models.items()}
+
+
+###########
+# FIT
+###########
+
+class PeakRSS:
+    # Polls this process's RSS while a fit runs: pool workers are forked from the
+    # (large) training script and reused, so ru_maxrss would not be per model
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._process = psutil.Process()
+        self._stop = threading.Event()
+
+    def _poll(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, self._process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.baseline = self.peak = self._process.memory_info().rss
+        self._thread = threading.Thread(target=self._poll, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self._process.memory_info().rss)
+
+
+def fit_model(name, spec, X, y, threads, model_dir="./models"):
+    params = dict(spec["params"], **({"n_jobs": threads} if spec["threaded"] else {}))
+
+    with threadpool_limits(threads), PeakRSS() as rss:
+        start = time.perf_counter()
+        model = spec["estimator"](**params).fit(X, y)
+        fit_time = time.perf_counter() - start
+
+    path = os.path.join(model_dir, f"{name}.pkl")
+    joblib.dump(model, path)
+
+    return {"target": spec["target"],
+            "estimator": spec["estimator"].__name__,
+            "params": params,
+            "threads": threads,
+            "fit_s": round(fit_time, 3),
+            "peak_rss_mb": round(rss.peak / 1024**2, 1),
+            "fit_rss_mb": round((rss.peak - rss.baseline) / 1024**2, 1),
+            "artifact": path,
+            "artifact_bytes": os.path.getsize(path),
+            "artifact_sha256": file_hash(path)}
+
+
+def train_survey_models(X, targets, models=SURVEY_MODELS, model_dir="./models", workers=None):
+    start = time.perf_counter()
+    budgets = thread_budgets(models)
+    workers = workers or min(len(models), os.cpu_count())
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=process_pool_context()) as executor:
+        futures = {name: executor.submit(fit_model, name, spec, X, targets[spec["target"]], budgets[name], model_dir)
+                   for name, spec in models.items()}
+        results = {name: future.result() for name, future in futures.items()}
+
+    manifest = {"created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "cpu_count": os.cpu_count(),
+                "workers": workers,
+                "training_rows": len(X),
+                "wall_s": round(time.perf_counter() - start, 3),
+                "models": results}
+
+    with open(os.path.join(model_dir, MANIFEST_NAME), "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    for name, result in results.items():
+        print(f"{name}: {result['estimator']} fit in {result['fit_s']:.2f} s on {result['threads']} thread(s), "
+              f"peak RSS {result['peak_rss_mb']:.0f} MB, {result['artifact_bytes'] / 1024:.0f} KB")
+    print(f"Trained {len(results)} survey models with {workers} workers in {manifest['wall_s']:.2f} s")
+
+    return manifest
@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import FeatureEngineer, SURVEY_INPUT_COLUMNS
+
+
+FREQUENCY_COLUMNS = [col for col in SURVEY_INPUT_COLUMNS if col.startswith("frequency_")]
+
+
+def survey_rows():
+    answers = ["Never", "Rarely", "Sometimes", "Often"]
+    rows = []
+    for i, (age, hours) in enumerate([(16, 1.0), (24, 3.5), (35, 8.0), (52, 0.5), (70, 12.0)]):
+        row = {"age": age,
+               "streaming_service": "Spotify",
+               "hours_per_day": hours,
+               "while_working": "Yes",
+               "instrumentalist": "No",
+               "fav_genre": "Rock",
+               "exploratory": "Yes",
+               "music_effects": "Improve"}
+        row.update({col: answers[(i + j) % len(answers)] for j, col in enumerate(FREQUENCY_COLUMNS)})
+        rows.append(row)
+    return pd.DataFrame(rows)[SURVEY_INPUT_COLUMNS]
+
+
+@pytest.fixture
+def fitted():
+    rows = survey_rows()
+    return FeatureEngineer().fit(rows), rows
+
+
+def test_single_row_matches_batch(fitted):
+    engineer, rows = fitted
+    batch = engineer.transform(rows)
+
+    for i in range(len(rows)):
+        single = engineer.transform(rows.iloc[[i]])
+        pd.testing.assert_frame_equal(single, batch.iloc[[i]])
+
+
+def test_single_row_keeps_hours_contribution(fitted):
+    # A one-row frame used to normalize hours_per_day against itself, giving 0 / 0
+    engineer, rows = fitted
+    row = rows.iloc[[2]]
+    out = engineer.transform(row).iloc[0]
+
+    freq = row[FREQUENCY_COLUMNS].iloc[0].map({"Never": 0, "Rarely": 1, "Sometimes": 2, "Often": 3})
+    hours_part = out["music_consumption_profile"] - (freq > 0).mean() * 0.3 - freq.mean() / 3 * 0.4
+
+    expected = 0.3 * (8.0 - 0.5) / (12.0 - 0.5)
+    assert hours_part == pytest.approx(expected)
+    assert hours_part > 0
@@ -0,0 +1,46 @@
+import os
+import sys
+import glob
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import horoscope_webscraping
+from horoscope_webscraping import parsers, rating_categories
+
+
+FIXTURES = sorted(glob.glob(os.path.join(ROOT, "benchmarks", "fixtures", "star_ratings", "*.html")))
+
+BACKENDS = ["soup", "strainer"] + (["lxml"] if horoscope_webscraping.lxml is not None else [])
+
+
+def stars(n, classes="icon-star-filled highlight"):
+    return "".join(f'<i class="{classes}"></i>' for _ in range(n)) + '<i class="icon-star-empty"></i>' * (5 - n)
+
+
+# A repeated header (the last one wins), star classes in another order or with extras
+TRICKY_PAGE = f"""<html><body>
+<h3>Sex {stars(2)}</h3>
+<h3>Hustle {stars(3, "highlight icon-star-filled")}</h3>
+<h3>Vibe {stars(4, "icon  icon-star-filled   highlight big")}</h3>
+<h3>Success {stars(1)}</h3>
+<h3>Sex {stars(5, "highlight icon-star-filled")}</h3>
+<h3>Other {stars(5)}</h3>
+</body></html>""".encode()
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=os.path.basename)
+def test_backends_agree_on_fixtures(path):
+    with open(path, "rb") as f:
+        page = f.read()
+
+    results = {backend: parsers[backend](page) for backend in BACKENDS}
+    assert sorted(results["soup"]) == sorted(rating_categories)
+    for backend, ratings in results.items():
+        assert ratings == results["soup"], backend
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_repeated_header_and_class_order(backend):
+    assert parsers[backend](TRICKY_PAGE) == {"sex": 5, "hustle": 3, "vibe": 4, "success": 1}
@@ -0,0 +1,47 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from preprocessing import Winsorizer
+
+
+@pytest.fixture
+def fitted():
+    # Fractional limits on both int columns (count: -0.5 / 11.5, plays: 0.5 / 4.5),
+    # and only count has an outlier in the fitted data
+    rng = np.random.default_rng(0)
+    train = pd.DataFrame({"count": np.r_[np.tile([2, 4, 5, 7], 25), 40],
+                          "plays": np.r_[np.tile([1, 2, 3, 4], 25), 3],
+                          "score": rng.normal(size=101)})
+    return Winsorizer(q1=0.25, q3=0.75).fit(train)
+
+
+def test_limits_and_float_columns(fitted):
+    assert fitted.upper_["count"] == 11.5
+    assert fitted.upper_["plays"] == 4.5
+    assert fitted.float_columns() == ["count", "score"]
+
+
+def test_dtypes_do_not_depend_on_the_batch(fitted):
+    clean = pd.DataFrame({"count": [3, 5], "plays": [2, 3], "score": [0.1, -0.2]})
+    outliers = pd.DataFrame({"count": [3, 90], "plays": [2, 50], "score": [0.1, 30.0]})
+
+    clean_out = fitted.transform(clean)
+    outlier_out = fitted.transform(outliers)
+
+    pd.testing.assert_series_equal(clean_out.dtypes, outlier_out.dtypes)
+    assert clean_out["count"].dtype == np.float64
+    assert clean_out["plays"].dtype == np.int64
+
+
+def test_fitted_limits_apply_to_every_batch(fitted):
+    out = fitted.transform(pd.DataFrame({"count": [90], "plays": [50], "score": [30.0]}))
+
+    assert out["count"].iloc[0] == 11.5
+    # An int column that stays int is capped at the largest integer inside its limit
+    assert out["plays"].iloc[0] == 4
+    assert out["score"].iloc[0] == fitted.upper_["score"]